@@ -0,0 +1,90 @@
+import math
+import time
+import timeit
+import numpy as np
+from semi_riemann import semi_riemann, semi_riemann_loop, richardson, error_relativo, adaptive_semi_riemann
+
+
+def expensive(x, delay=2e-4):
+    """Stand-in for a costly integrand such as a simulation call."""
+    time.sleep(delay)
+    return math.exp(-x) * math.sin(x)
+
+
+def benchmark_semi_riemann(n=1000000):
+    """
+    Compares the notebook loop against semi_riemann with a scalar-only f
+    (sampled point by point) and with a vectorized f.
+    """
+    loop_time = timeit.timeit(lambda: semi_riemann_loop(math.sin, 0, math.pi, n), number=1)
+    scalar_time = timeit.timeit(lambda: semi_riemann(math.sin, 0, math.pi, n), number=1)
+    vector_time = timeit.timeit(lambda: semi_riemann(np.sin, 0, math.pi, n), number=1)
+
+    print(f"sin(x) on [0, pi], n = {n}")
+    print(f"{'notebook loop':<30}{loop_time * 1e3:>12.1f} ms")
+    print(f"{'semi_riemann, math.sin':<30}{scalar_time * 1e3:>12.1f} ms{loop_time / scalar_time:>8.1f} x")
+    print(f"{'semi_riemann, np.sin':<30}{vector_time * 1e3:>12.1f} ms{loop_time / vector_time:>8.1f} x")
+
+
+def benchmark_richardson(tol=1e-8):
+    """
+    Compares the function evaluations that brute-force refinement of n and
+    richardson need to reach a relative error below tol for sin on [0, pi].
+    """
+    n = 10
+    while error_relativo(2, semi_riemann(np.sin, 0, math.pi, n)) > tol and n < 10**7:
+        n *= 10
+    result = richardson(np.sin, 0, math.pi, tol)
+
+    print(f"sin(x) on [0, pi], relative error < {tol:g}")
+    print(f"{'brute force':<30}{n + 1:>12d} evaluations, error "
+          f"{error_relativo(2, semi_riemann(np.sin, 0, math.pi, n)):.1e}")
+    print(f"{'richardson':<30}{result['evaluations']:>12d} evaluations, error "
+          f"{error_relativo(2, result['value']):.1e}")
+
+
+def benchmark_adaptive(tol=1e-4):
+    """
+    Compares the function evaluations of adaptive_semi_riemann against the
+    uniform n that reaches the same error, for a function with a narrow peak.
+    """
+    f = lambda x: 1 / (1 + (100 * (x - 0.3))**2)
+    real = (math.atan(70) + math.atan(30)) / 100
+    result = adaptive_semi_riemann(f, 0, 1, tol)
+    error = abs(result["value"] - real)
+
+    n = 1
+    while abs(semi_riemann(f, 0, 1, n) - real) > error:
+        n = int(n * 1.1) + 1
+
+    print(f"1/(1 + (100(x - 0.3))^2) on [0, 1], error {error:.1e}")
+    print(f"{'uniform n':<30}{n + 1:>12d} evaluations")
+    print(f"{'adaptive_semi_riemann':<30}{result['evaluations']:>12d} evaluations")
+    print(f"{'ratio':<30}{(n + 1) / result['evaluations']:>12.1f} x")
+
+
+def benchmark_workers(n=4000, workers=(1, 2, 4, 8)):
+    """
+    Measures how semi_riemann scales with the number of worker processes
+    for an expensive integrand.
+    """
+    print(f"expensive(x) on [0, 10], n={n}")
+    base_time = base_value = None
+    for count in workers:
+        start = time.perf_counter()
+        value = semi_riemann(expensive, 0, 10, n, vectorized=False, workers=count)
+        elapsed = time.perf_counter() - start
+        base_time = base_time or elapsed
+        base_value = value if base_value is None else base_value
+        print(f"{f'{count} workers':<30}{elapsed * 1e3:>12.1f} ms{base_time / elapsed:>8.2f} x"
+              f"  {'identical' if value == base_value else 'different'}")
+
+
+if __name__ == '__main__':
+    benchmark_semi_riemann()
+    print()
+    benchmark_richardson()
+    print()
+    benchmark_adaptive()
+    print()
+    benchmark_workers()
@@ -0,0 +1,453 @@
+import heapq
+import itertools
+import math
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+import numpy as np
+
+
+def sample(f: Callable, x: np.ndarray, vectorized: Optional[bool] = None) -> np.ndarray:
+    """
+    Evalúa f una sola vez en cada punto de la malla x.
+
+        Parametros
+        ----------
+          f : function,
+          Función matemática f(x).
+
+          x: np.ndarray,
+          Puntos de la malla.
+
+          vectorized: bool o None,
+          True si f acepta un arreglo de NumPy y devuelve un arreglo con el
+          valor en cada punto, False si solo acepta floats. Con None se
+          intenta primero la llamada con el arreglo completo y, si f no la
+          admite (por ejemplo math.sin), se evalúa punto por punto.
+
+        Returns
+        ------
+          np.ndarray,
+          Arreglo float64 con f(x) para cada punto de x.
+    """
+    if vectorized is not False:
+        try:
+            values = np.asarray(f(x), dtype=float)
+            if values.shape == x.shape:
+                return values
+        except (TypeError, ValueError):
+            pass
+        if vectorized:
+            raise ValueError("f no devuelve un valor por cada punto del arreglo")
+    return np.fromiter((f(float(xi)) for xi in x), dtype=float, count=len(x))
+
+
+def panel_areas(y: np.ndarray, step: float) -> np.ndarray:
+    """
+    Área de cada segmento de la suma de Semi-Riemann, con los valores de f en
+    los extremos de los segmentos: rectángulo + triángulo + semicírculo.
+
+        Parametros
+        ----------
+          y: np.ndarray,
+          Valores de f en los n+1 puntos de la malla.
+
+          step: float,
+          Ancho de cada segmento.
+
+        Returns
+        ------
+          np.ndarray,
+          Arreglo con el área de cada uno de los n segmentos.
+    """
+    fx1, fx2 = y[:-1], y[1:]
+    rectangle_area = np.minimum(fx1, fx2) * step
+    triangle_area = np.abs(fx2 - fx1) * step / 2
+    # Semicírculo de diámetro d = sqrt(step² + (fx2 - fx1)²): pi * (d/2)² / 2
+    semicircle_area = math.pi * (step**2 + (fx2 - fx1)**2) / 8
+    return rectangle_area + triangle_area + semicircle_area
+
+
+def sample_parallel(f: Callable, x: np.ndarray, vectorized: Optional[bool] = None,
+                    workers: int = 1) -> np.ndarray:
+    """
+    Como sample, pero repartiendo la malla x en tramos contiguos entre
+    workers procesos. Los tramos no se traslapan: el punto que comparten dos
+    tramos vecinos de la suma se evalúa en uno solo de ellos, y los valores
+    se devuelven en el orden de x. f debe poder enviarse a otro proceso
+    (una función definida a nivel de módulo, no una lambda).
+    """
+    if workers <= 1:
+        return sample(f, x, vectorized)
+
+    # Varios tramos por proceso para repartir la carga si f cuesta distinto en cada zona
+    chunks = np.array_split(x, min(len(x), workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        values = executor.map(sample, [f] * len(chunks), chunks, [vectorized] * len(chunks))
+        return np.concatenate(list(values))
+
+
+def semi_riemann(f: Callable, a: float, b: float, n: int, vectorized: Optional[bool] = None,
+                 workers: int = 1) -> float:
+    """
+    Función que calcula y retorna la suma de Semi-Riemann.
+    f se evalúa una sola vez en cada uno de los n+1 puntos de la malla (los
+    extremos compartidos por dos segmentos no se repiten), las áreas de todos
+    los segmentos se calculan con operaciones de arreglos y se suman con
+    la suma por pares de NumPy.
+    Con workers > 1 las evaluaciones de f se reparten en tramos contiguos de
+    la malla entre varios procesos (ver sample_parallel), útil cuando f es
+    costosa. Las áreas y su suma se calculan igual que con un proceso, así
+    que el resultado es idéntico bit a bit para cualquier número de procesos.
+
+        Parametros
+        ----------
+          f : function(float) -> float,
+          Recibe una función matemática f(x). Esta recibe un valor de x
+          y devuelve el resultado de su cálculo en x.
+
+          a: float,
+          Límite inferior de la suma de Semi-Riemann.
+
+          b: float,
+          Límite superior de la suma de Semi-Riemann.
+
+          n: int,
+          Número de pasos que se desean efectuar para la aproximación de la suma
+          de Semi-Riemann.
+
+          vectorized: bool o None,
+          Si f acepta arreglos de NumPy (ver sample). Con None se detecta.
+
+          workers: int,
+          Número de procesos que evalúan f.
+
+        Returns
+        ------
+          float,
+          Retorna un número de punto flotante equivalente a la suma de
+          Semi-Riemann de la función f que va desde a hasta b y con n pasos.
+    """
+    if b <= a or n < 1:
+        return 0
+
+    step = (b - a) / n
+    x = a + np.arange(n + 1) * step
+    y = sample_parallel(f, x, vectorized, workers)
+    return float(np.sum(panel_areas(y, step)))
+
+
+def semi_riemann_loop(f: Callable, a: float, b: float, n: int) -> float:
+    """
+    Implementación de referencia de la suma de Semi-Riemann, tal como la
+    calcula el notebook: recorre los segmentos uno por uno y evalúa f dos
+    veces por segmento. Es lenta; se mantiene para comparar con semi_riemann
+    en las pruebas y en benchmark.py.
+
+        Parametros
+        ----------
+          f : function(float) -> float,
+          Función matemática f(x).
+
+          a: float,
+          Límite inferior de la suma de Semi-Riemann.
+
+          b: float,
+          Límite superior de la suma de Semi-Riemann.
+
+          n: int,
+          Número de segmentos.
+
+        Returns
+        ------
+          float,
+          La suma de Semi-Riemann de f desde a hasta b con n segmentos.
+    """
+    if b <= a or n < 1:
+        return 0
+
+    step = (b - a) / n
+    total_sum = 0
+    for i in range(n):
+        x1 = a + i * step
+        x2 = x1 + step
+        fx1 = f(x1)
+        fx2 = f(x2)
+        short_bar = min(fx1, fx2)
+        large_bar = max(fx1, fx2)
+        rectangle_area = short_bar * step
+        triangle_area = (large_bar - short_bar) * step / 2
+        circle_radius = math.sqrt(math.pow(x2 - x1, 2) + math.pow(fx2 - fx1, 2)) / 2
+        total_sum += rectangle_area + triangle_area + math.pi * math.pow(circle_radius, 2) / 2
+    return total_sum
+
+
+class NestedGrid:
+    """
+    Caché de los valores de f en mallas uniformes anidadas de [a, b].
+    La malla de n segmentos contiene a la de m segmentos si m divide a n, así
+    que al refinar f solo se evalúa en los puntos nuevos, y la malla de una n
+    más gruesa se toma de una más fina sin evaluar f.
+
+        Atributos
+        ---------
+          evaluations: int,
+          Número de puntos en los que se ha evaluado f.
+    """
+
+    def __init__(self, f: Callable, a: float, b: float, vectorized: Optional[bool] = None):
+        self.f = f
+        self.a = a
+        self.b = b
+        self.vectorized = vectorized
+        self.grids = {}  # n -> valores de f en los n+1 puntos de la malla
+        self.evaluations = 0
+
+    def values(self, n: int) -> np.ndarray:
+        """Valores de f en los n+1 puntos de la malla de n segmentos."""
+        if n in self.grids:
+            return self.grids[n]
+        finer = [m for m in self.grids if m % n == 0]
+        if finer:
+            m = min(finer)
+            return self.grids[m][::m // n]
+
+        x = self.a + np.arange(n + 1) * ((self.b - self.a) / n)
+        coarser = [m for m in self.grids if n % m == 0]
+        if coarser:
+            m = max(coarser)
+            y = np.empty(n + 1)
+            y[::n // m] = self.grids[m]
+            new = np.arange(n + 1) % (n // m) != 0
+            y[new] = sample(self.f, x[new], self.vectorized)
+            self.evaluations += int(new.sum())
+            # La malla nueva contiene a las más gruesas
+            for m in coarser:
+                del self.grids[m]
+        else:
+            y = sample(self.f, x, self.vectorized)
+            self.evaluations += n + 1
+        self.grids[n] = y
+        return y
+
+    def semi_riemann(self, n: int) -> float:
+        """Suma de Semi-Riemann con n pasos, reutilizando los valores de f."""
+        if self.b <= self.a or n < 1:
+            return 0
+        return float(np.sum(panel_areas(self.values(n), (self.b - self.a) / n)))
+
+
+def richardson_table(sums: list, ratio: int) -> list:
+    """
+    Tabla de extrapolación de Richardson de sumas con n, n*ratio, n*ratio², ...
+    pasos. El error de la suma de Semi-Riemann tiene la forma
+    c1*h + c2*h² + c3*h³ + ... (el semicírculo aporta el término en h), así
+    que la columna j elimina el término h^j.
+
+        Parametros
+        ----------
+          sums: list,
+          Sumas de Semi-Riemann de mallas cada vez más finas.
+
+          ratio: int,
+          Factor de refinamiento entre mallas consecutivas.
+
+        Returns
+        ------
+          list,
+          Tabla triangular: la fila k tiene k+1 valores y el último es la
+          mejor estimación con las primeras k+1 sumas.
+    """
+    table = []
+    for k, value in enumerate(sums):
+        row = [value]
+        for j in range(1, k + 1):
+            row.append(row[j - 1] + (row[j - 1] - table[k - 1][j - 1]) / (ratio**j - 1))
+        table.append(row)
+    return table
+
+
+def convergence_order(sums: list, ratio: int) -> np.ndarray:
+    """
+    Orden de convergencia observado con tres sumas consecutivas:
+    p = log(|S_k-1 - S_k-2| / |S_k - S_k-1|) / log(ratio).
+    """
+    differences = np.abs(np.diff(sums))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.log(differences[:-1] / differences[1:]) / math.log(ratio)
+
+
+def convergence_study(f: Callable, a: float, b: float, n0: int = 10, ratio: int = 2,
+                      levels: int = 5, real: Optional[float] = None,
+                      vectorized: Optional[bool] = None) -> dict:
+    """
+    Estudio de convergencia de la suma de Semi-Riemann con n = n0, n0*ratio,
+    n0*ratio², ... Cada malla reutiliza todos los valores de f de las
+    anteriores (ver NestedGrid).
+
+        Parametros
+        ----------
+          f, a, b: como en semi_riemann.
+
+          n0: int,
+          Número de pasos de la malla más gruesa.
+
+          ratio: int,
+          Factor de refinamiento entre mallas consecutivas.
+
+          levels: int,
+          Número de mallas.
+
+          real: float o None,
+          Valor exacto de la integral, si se conoce, para calcular los errores
+          relativos.
+
+        Returns
+        ------
+          dict,
+          "n": pasos de cada malla, "sums": sumas de Semi-Riemann,
+          "extrapolated": extrapolación de Richardson con las mallas hasta
+          cada nivel, "order": orden de convergencia observado (desde el
+          tercer nivel), "evaluations": evaluaciones de f acumuladas y, si se
+          da real, "errors" y "extrapolated_errors" relativos.
+    """
+    grid = NestedGrid(f, a, b, vectorized)
+    n_values, sums, evaluations = [], [], []
+    for level in range(levels):
+        n = n0 * ratio**level
+        n_values.append(n)
+        sums.append(grid.semi_riemann(n))
+        evaluations.append(grid.evaluations)
+
+    study = {
+        "n": n_values,
+        "sums": sums,
+        "extrapolated": [row[-1] for row in richardson_table(sums, ratio)],
+        "order": convergence_order(sums, ratio),
+        "evaluations": evaluations,
+    }
+    if real is not None:
+        study["errors"] = [error_relativo(real, value) for value in study["sums"]]
+        study["extrapolated_errors"] = [error_relativo(real, value) for value in study["extrapolated"]]
+    return study
+
+
+def richardson(f: Callable, a: float, b: float, tol: float = 1e-8, n0: int = 10,
+               ratio: int = 2, max_levels: int = 20, vectorized: Optional[bool] = None) -> dict:
+    """
+    Integral de f en [a, b] por extrapolación de Richardson de sumas de
+    Semi-Riemann: se refina la malla (n0, n0*ratio, ...) reutilizando los
+    valores de f hasta que dos extrapolaciones consecutivas difieren en
+    menos de tol, en términos relativos.
+
+        Returns
+        ------
+          dict,
+          "value": integral estimada, "n": pasos de la malla más fina,
+          "evaluations": evaluaciones de f, "converged": bool.
+    """
+    grid = NestedGrid(f, a, b, vectorized)
+    sums, previous = [], None
+    for level in range(max_levels):
+        n = n0 * ratio**level
+        sums.append(grid.semi_riemann(n))
+        value = richardson_table(sums, ratio)[-1][-1]
+        if previous is not None and abs(value - previous) <= tol * abs(value):
+            return {"value": value, "n": n, "evaluations": grid.evaluations, "converged": True}
+        previous = value
+    return {"value": value, "n": n, "evaluations": grid.evaluations, "converged": False}
+
+
+def panel_area(x1: float, x2: float, fx1: float, fx2: float) -> float:
+    """Área de un segmento de la suma de Semi-Riemann, ver panel_areas."""
+    step = x2 - x1
+    return min(fx1, fx2) * step + abs(fx2 - fx1) * step / 2 + math.pi * (step**2 + (fx2 - fx1)**2) / 8
+
+
+def adaptive_semi_riemann(f: Callable, a: float, b: float, tol: float = 1e-6, n0: int = 4,
+                          max_evaluations: int = 100000) -> dict:
+    """
+    Suma de Semi-Riemann adaptativa: en lugar de un paso uniforme, solo se
+    subdividen los segmentos donde hace falta para llegar a la tolerancia.
+    Cada segmento [x1, x2] se estima con un solo segmento (S1) y con sus dos
+    mitades (S2); su error se estima como |S2 - S1| (el error de la suma es
+    proporcional al paso). Los segmentos esperan en una cola de prioridad
+    (heap) ordenada por ese error, y mientras la suma de los errores supere
+    tol se divide el segmento con mayor error: cada división evalúa f en
+    los puntos medios de las dos mitades.
+
+        Parametros
+        ----------
+          f, a, b: como en semi_riemann.
+
+          tol: float,
+          Error absoluto estimado que se desea alcanzar.
+
+          n0: int,
+          Número de segmentos iniciales, uniformes.
+
+          max_evaluations: int,
+          Máximo de evaluaciones de f.
+
+        Returns
+        ------
+          dict,
+          "value": suma de Semi-Riemann de los segmentos finales,
+          "error": error estimado, "evaluations": evaluaciones de f,
+          "panels": número de segmentos de la suma (las dos mitades de cada
+          segmento de la cola), "converged": bool.
+    """
+    if b <= a or n0 < 1:
+        return {"value": 0, "error": 0, "evaluations": 0, "panels": 0, "converged": True}
+
+    step = (b - a) / n0
+    x = a + np.arange(2 * n0 + 1) * (step / 2)
+    y = sample(f, x)
+    evaluations = len(x)
+
+    heap = []
+    counter = itertools.count()  # Desempata errores iguales sin comparar los segmentos
+
+    def push(x1, x2, fx1, fxm, fx2):
+        xm = (x1 + x2) / 2
+        halves = panel_area(x1, xm, fx1, fxm) + panel_area(xm, x2, fxm, fx2)
+        error = abs(halves - panel_area(x1, x2, fx1, fx2))
+        heapq.heappush(heap, (-error, next(counter), x1, x2, fx1, fxm, fx2, halves))
+        return error
+
+    total_error = sum(push(x[2*i], x[2*i + 2], y[2*i], y[2*i + 1], y[2*i + 2]) for i in range(n0))
+    while total_error > tol and evaluations + 2 <= max_evaluations:
+        neg_error, _, x1, x2, fx1, fxm, fx2, _ = heapq.heappop(heap)
+        xm = (x1 + x2) / 2
+        fxl, fxr = f((x1 + xm) / 2), f((xm + x2) / 2)
+        evaluations += 2
+        total_error += neg_error
+        total_error += push(x1, xm, fx1, fxl, fxm)
+        total_error += push(xm, x2, fxm, fxr, fx2)
+
+    error = math.fsum(-panel[0] for panel in heap)
+    return {
+        "value": math.fsum(panel[-1] for panel in heap),
+        "error": error,
+        "evaluations": evaluations,
+        "panels": 2 * len(heap),
+        "converged": error <= tol,
+    }
+
+
+def error_relativo(real: float, aproximado: float) -> float:
+    """
+    Calcula el error relativo entre un valor real y un valor aproximado.
+
+    Parametros
+    ----------
+    real : float
+        Valor real o exacto.
+    aproximado : float
+        Valor aproximado.
+
+    Returns
+    -------
+    float
+        El error relativo, dado por |(real - aproximado) / real|.
+    """
+    return abs(real - aproximado) / abs(real)
@@ -0,0 +1,118 @@
+import math
+import numpy as np
+import pytest
+from semi_riemann import semi_riemann, semi_riemann_loop, sample, sample_parallel, error_relativo, NestedGrid, convergence_study, richardson, adaptive_semi_riemann
+
+def f1(x):
+    return x + 1
+
+@pytest.mark.parametrize('n, expected', [(10, 8.2069), (100, 7.5707)])
+def test_linear(n, expected):
+    # Resultados del notebook para f(x) = x + 1 en [0, 3]
+    assert round(semi_riemann(f1, 0, 3, n), 4) == expected
+
+@pytest.mark.parametrize('n, expected', [(10, 2.5633), (100, 2.0580), (1000, 2.0058)])
+def test_sin(n, expected):
+    # Resultados del notebook para sin(x) en [0, pi]
+    assert round(semi_riemann(math.sin, 0, math.pi, n), 4) == expected
+    assert round(semi_riemann(np.sin, 0, math.pi, n), 4) == expected
+
+def test_matches_loop():
+    for f, a, b in [(math.exp, -1, 2), (lambda x: math.cos(3*x), 0, 5)]:
+        for n in (1, 7, 500):
+            assert semi_riemann(f, a, b, n) == pytest.approx(semi_riemann_loop(f, a, b, n), rel=1e-12)
+
+def test_samples_once():
+    calls = []
+    def f(x):
+        calls.append(x)
+        return math.exp(-x)
+    semi_riemann(f, 0, 1, 50, vectorized=False)
+    assert len(calls) == 51
+    
+    calls.clear()
+    semi_riemann(lambda x: calls.append(x) or np.exp(-x), 0, 1, 50)
+    assert len(calls) == 1  # Una sola llamada con todo el arreglo
+
+def test_sample():
+    x = np.linspace(0, 1, 5)
+    np.testing.assert_array_equal(sample(math.sqrt, x), np.sqrt(x))
+    np.testing.assert_array_equal(sample(lambda x: 2.0, x, vectorized=False), np.full(5, 2.0))
+    with pytest.raises(ValueError):
+        sample(lambda x: 2.0, x, vectorized=True)
+
+def test_invalid_limits():
+    assert semi_riemann(f1, 3, 0, 10) == 0
+    assert semi_riemann(f1, 0, 3, 0) == 0
+
+def test_error_relativo():
+    assert error_relativo(2, 2.0058) == pytest.approx(0.0029)
+
+def test_nested_grid():
+    calls = []
+    def f(x):
+        calls.append(x)
+        return math.exp(-x)
+    grid = NestedGrid(f, 0, 2, vectorized=False)
+    sums = [grid.semi_riemann(n) for n in (10, 20, 40)]
+    # Cada punto de la malla más fina se evaluó una sola vez
+    assert grid.evaluations == len(calls) == 41
+    for n, value in zip((10, 20, 40), sums):
+        assert value == pytest.approx(semi_riemann(f, 0, 2, n), rel=1e-13)
+    
+    # Las mallas más gruesas salen de la más fina sin evaluar f
+    grid.semi_riemann(5)
+    assert grid.evaluations == 41
+
+def test_convergence_study():
+    study = convergence_study(np.sin, 0, math.pi, n0=10, levels=6, real=2)
+    assert study["n"] == [10, 20, 40, 80, 160, 320]
+    assert study["evaluations"][-1] == 321
+    # La suma de Semi-Riemann converge con orden 1
+    np.testing.assert_allclose(study["order"][-1], 1, atol=0.01)
+    assert study["extrapolated_errors"][-1] < 1e-8 < study["errors"][-1]
+
+def test_richardson():
+    result = richardson(math.exp, -1, 2, tol=1e-10)
+    real = math.exp(2) - math.exp(-1)
+    assert result["converged"]
+    assert error_relativo(real, result["value"]) < 1e-10
+    assert result["evaluations"] < 1000
+
+def peak(x):
+    return 1 / (1 + (100 * (x - 0.3))**2)
+
+PEAK_AREA = (math.atan(70) + math.atan(30)) / 100
+
+def test_adaptive():
+    calls = []
+    def f(x):
+        calls.append(np.size(x))
+        return peak(x)
+    result = adaptive_semi_riemann(f, 0, 1, tol=1e-3)
+    assert result["converged"]
+    assert result["evaluations"] == sum(calls)
+    # El error estimado es cercano al real
+    assert abs(result["value"] - PEAK_AREA) == pytest.approx(result["error"], rel=0.1)
+
+    # Con las mismas evaluaciones, el paso uniforme tiene un error mucho mayor
+    uniform = semi_riemann(peak, 0, 1, result["evaluations"] - 1)
+    assert abs(uniform - PEAK_AREA) > 5 * abs(result["value"] - PEAK_AREA)
+
+def test_adaptive_limits():
+    result = adaptive_semi_riemann(math.sin, 0, math.pi, tol=1e-9, max_evaluations=1000)
+    assert not result["converged"]
+    assert result["evaluations"] <= 1000
+    assert adaptive_semi_riemann(math.sin, 1, 0)["value"] == 0
+
+@pytest.mark.parametrize("vectorized", [None, False])
+def test_workers(vectorized):
+    # f debe poder enviarse a los procesos: math.exp y np.exp, no lambdas
+    f = math.exp if vectorized is False else np.exp
+    serial = semi_riemann(f, 0, 2, 1001, vectorized=vectorized)
+    for workers in (2, 3):
+        assert semi_riemann(f, 0, 2, 1001, vectorized=vectorized, workers=workers) == serial
+
+    # Cada punto se evalúa una vez y los valores vuelven en el orden de x
+    x = np.linspace(0, 1, 7)
+    np.testing.assert_array_equal(sample_parallel(f, x, vectorized, workers=4), np.exp(x))
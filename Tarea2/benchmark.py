@@ -0,0 +1,114 @@
+import math
+import timeit
+import numpy as np
+from expressions import compile_expression
+from fixed_point_method import fixed_point_method, fixed_point_batch
+from punto_fijo import solve, format_iterations
+from history import IterationHistory
+
+
+def benchmark_expression_compilation(expr="(x**2-6)/12 + math.sin(x)/100", number=200000):
+    """
+    Compares the per-iteration cost of evaluating g(x) from its source string
+    with `eval` against calling the compiled callable.
+    """
+    compile_expression.cache_clear()
+
+    raw_time = timeit.timeit(
+        lambda: eval(expr, {"x": 0.5, "math": math}), number=number
+    )
+    g = compile_expression(expr)
+    compiled_time = timeit.timeit(lambda: g(0.5), number=number)
+
+    print(f"Expression: {expr}")
+    print(f"{'eval(str) per iteration':<30}{raw_time / number * 1e9:>12.1f} ns")
+    print(f"{'compiled per iteration':<30}{compiled_time / number * 1e9:>12.1f} ns")
+    print(f"{'speedup':<30}{raw_time / compiled_time:>12.1f} x")
+
+
+def benchmark_batch(expr="math.cos(x)", lanes=10000, tol=1e-10, max_iter=200):
+    """
+    Compares sweeping many initial points with one scalar run per point
+    against a single vectorized batch run.
+    """
+    p0_array = np.linspace(-10, 10, lanes)
+
+    loop_time = timeit.timeit(
+        lambda: [fixed_point_method(expr, p0, tol, max_iter) for p0 in p0_array],
+        number=1,
+    )
+    batch_time = timeit.timeit(
+        lambda: fixed_point_batch(expr, p0_array, tol, max_iter), number=1
+    )
+
+    print(f"Expression: {expr}, {lanes} initial points")
+    print(f"{'scalar loop':<30}{loop_time * 1e3:>12.1f} ms")
+    print(f"{'fixed_point_batch':<30}{batch_time * 1e3:>12.1f} ms")
+    print(f"{'speedup':<30}{loop_time / batch_time:>12.1f} x")
+
+
+def benchmark_workers(functions_count=20000, tol=1e-10, max_iter=1000, workers=(1, 2, 4, 8)):
+    """
+    Measures how the batch driver scales with the number of worker processes.
+    """
+    expressions = ["math.cos(x)", "(x**2-6)/12", "math.exp(-x)", "math.sin(x)"]
+    functions = [
+        {"name": f"func{i}", "expr": expressions[i % len(expressions)], "p0": (i % 10) / 10}
+        for i in range(functions_count)
+    ]
+
+    print(f"{functions_count} functions, max_iter={max_iter}")
+    base_time = None
+    for count in workers:
+        elapsed = timeit.timeit(
+            lambda: solve(functions, tol, max_iter, workers=count), number=1
+        )
+        base_time = base_time or elapsed
+        print(f"{f'{count} workers':<30}{elapsed * 1e3:>12.1f} ms{base_time / elapsed:>8.2f} x")
+
+
+def benchmark_writer(rows=100000, number=5):
+    """
+    Compares formatting an iteration table row by row with f-strings against
+    format_iterations, which renders the whole table in one call.
+    """
+    rng = np.random.default_rng(0)
+    history = IterationHistory(capacity=rows)
+    for x, error in zip(rng.normal(0, 1e4, rows), rng.exponential(1e-3, rows)):
+        history.append(x, error)
+
+    def format_rows():
+        lines = []
+        for iter_data in history:
+            x_val = iter_data["x"]
+            error_val = iter_data["error"]
+            x_str = (
+                f"{x_val:25.6e}"
+                if abs(x_val) > 1e6 or abs(x_val) < 1e-6
+                else f"{x_val:25.6f}"
+            )
+            error_str = (
+                f"{error_val:25.6e}"
+                if abs(error_val) > 1e6 or abs(error_val) < 1e-6
+                else f"{error_val:25.6f}"
+            )
+            lines.append(f"{iter_data['n']:4d} {x_str} {error_str}\n")
+        return "".join(lines)
+
+    row_time = timeit.timeit(format_rows, number=number) / number
+    table_time = timeit.timeit(lambda: format_iterations(history), number=number) / number
+
+    print(f"Iteration table with {rows} rows")
+    print(f"{'row by row':<30}{row_time * 1e3:>12.1f} ms")
+    print(f"{'format_iterations':<30}{table_time * 1e3:>12.1f} ms")
+    print(f"{'speedup':<30}{row_time / table_time:>12.1f} x")
+
+
+if __name__ == "__main__":
+    benchmark_expression_compilation()
+    print()
+    benchmark_batch()
+    print()
+    benchmark_workers()
+    print()
+    benchmark_writer()
@@ -0,0 +1,147 @@
+import ast
+import math
+import types
+import numpy as np
+from functools import lru_cache, reduce
+
+# Maximum number of distinct expressions kept compiled at the same time
+CACHE_SIZE = 4096
+
+# File name of the compiled expressions, as it appears in tracebacks
+EXPRESSION_FILENAME = "<expression>"
+
+
+class VectorizationError(ValueError):
+    """The expression uses math names that have no vetted NumPy counterpart."""
+
+
+def _unary(ufunc):
+    return lambda x: ufunc(x)
+
+
+def _binary(ufunc):
+    return lambda x, y: ufunc(x, y)
+
+
+def _log(x, base=None):
+    return np.log(x) if base is None else np.log(x) / np.log(base)
+
+
+def _hypot(*coordinates):
+    return reduce(np.hypot, coordinates, 0.0)
+
+
+# math names that act elementwise on NumPy arrays with the same meaning and
+# signature as in math. The ufuncs are wrapped so that an extra argument
+# raises TypeError, as in math, instead of being taken as the `out` array.
+VECTOR_MATH = types.SimpleNamespace(
+    pi=math.pi, e=math.e, tau=math.tau, inf=math.inf, nan=math.nan,
+    log=_log, hypot=_hypot,
+    **{
+        name: _unary(ufunc)
+        for name, ufunc in {
+            "sin": np.sin, "cos": np.cos, "tan": np.tan,
+            "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+            "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+            "asinh": np.arcsinh, "acosh": np.arccosh, "atanh": np.arctanh,
+            "exp": np.exp, "expm1": np.expm1, "log10": np.log10,
+            "log2": np.log2, "log1p": np.log1p, "sqrt": np.sqrt,
+            "fabs": np.fabs, "floor": np.floor, "ceil": np.ceil,
+            "trunc": np.trunc, "degrees": np.degrees, "radians": np.radians,
+        }.items()
+    },
+    **{
+        name: _binary(ufunc)
+        for name, ufunc in {
+            "atan2": np.arctan2, "pow": np.power,
+            "copysign": np.copysign, "fmod": np.fmod,
+        }.items()
+    },
+)
+
+
+# Builtins that act elementwise on NumPy arrays, with their number of arguments
+VECTOR_BUILTINS = {"abs": 1, "pow": 2}
+
+# Nodes that need a single truth value, which an array doesn't have
+SCALAR_NODES = (ast.IfExp, ast.BoolOp, ast.Compare)
+
+
+def check_vectorizable(tree):
+    """
+    Raises VectorizationError unless the parsed expression can be evaluated
+    on NumPy arrays: it may only use x, arithmetic, the names of
+    VECTOR_MATH as math.<name> and calls to the builtins of VECTOR_BUILTINS.
+    Conditionals, comparisons and boolean operators, or builtins such as
+    min, round and float, only work on scalars.
+    """
+    math_names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, SCALAR_NODES):
+            raise VectorizationError(
+                f"{type(node).__name__} needs scalar values and cannot be evaluated on NumPy arrays"
+            )
+        if isinstance(node, ast.Attribute) and isinstance(node.value, ast.Name) and node.value.id == "math":
+            if not hasattr(VECTOR_MATH, node.attr):
+                raise VectorizationError(f"math.{node.attr} cannot be evaluated on NumPy arrays")
+            math_names.add(id(node.value))
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            arguments = VECTOR_BUILTINS.get(node.func.id)
+            if arguments is None or len(node.args) != arguments or node.keywords:
+                raise VectorizationError(f"{node.func.id}() cannot be evaluated on NumPy arrays")
+        elif isinstance(node, ast.Name) and node.id not in ("x", "math", *VECTOR_BUILTINS):
+            raise VectorizationError(f"{node.id} cannot be evaluated on NumPy arrays")
+    uses = [node for node in ast.walk(tree) if isinstance(node, ast.Name) and node.id == "math"]
+    if any(id(node) not in math_names for node in uses):
+        raise VectorizationError("math can only be used as math.<name> on NumPy arrays")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(expr, vectorized=False):
+    """
+    Compiles the string expression of g(x) into a callable g(x).
+    The expression is parsed only once: its AST is wrapped in a
+    `lambda x: <expr>` node, so later calls skip parsing and the
+    namespace dictionary that `eval` builds on every iteration.
+
+    Parameters:
+    - expr: String expression of the function g(x)
+    - vectorized: If True, `math` is bound to VECTOR_MATH so that
+      `math.sin`, `math.exp`, ... act elementwise and x can be a NumPy array.
+
+    Returns:
+    - callable: Function of one argument x that evaluates the expression
+
+    Raises:
+    - SyntaxError: If the expression is not a valid Python expression
+    - VectorizationError: If vectorized and the expression can't be
+      evaluated on arrays, see check_vectorizable (e.g. math.gamma or min)
+    """
+    tree = ast.parse(expr.strip(), mode="eval")
+    if vectorized:
+        check_vectorizable(tree)
+    function = ast.Expression(
+        body=ast.Lambda(
+            args=ast.arguments(
+                posonlyargs=[],
+                args=[ast.arg(arg="x")],
+                kwonlyargs=[],
+                kw_defaults=[],
+                defaults=[],
+            ),
+            body=tree.body,
+        )
+    )
+    ast.fix_missing_locations(function)
+    code = compile(function, EXPRESSION_FILENAME, "eval")
+    return eval(code, {"math": VECTOR_MATH if vectorized else math})
+
+
+def raised_in_expression(error):
+    """True if the exception was raised while evaluating a compiled g(x)."""
+    traceback = error.__traceback__
+    while traceback is not None:
+        if traceback.tb_frame.f_code.co_filename == EXPRESSION_FILENAME:
+            return True
+        traceback = traceback.tb_next
+    return False
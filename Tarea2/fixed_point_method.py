@@ -1,8 +1,71 @@
 import numpy as np
-import math
+import cmath
+from collections import deque
+from expressions import compile_expression, VectorizationError
+from history import IterationHistory
 
 
-def fixed_point_method(expr, p0, tol=1e-6, max_iter=100):
+ACCELERATION_MODES = ("none", "aitken", "steffensen")
+
+
+class EarlyExit:
+    """
+    Early-exit detectors for iterations that will not converge.
+    They are checked after every iteration and return the termination reason:
+    - "non_finite": the next iterate or the error is NaN or infinite.
+    - "diverging": the error grew monotonically over the last
+      divergence_window iterations.
+    - "cycle_k": the last 2k iterates repeat with period k (2 <= k <= cycle_period)
+      within the tolerance and the error did not shrink over the period, which
+      tells a cycle apart from a slowly converging oscillation.
+    A window or period of 0 disables the corresponding detector.
+    """
+
+    def __init__(self, tol, divergence_window=0, cycle_period=0, check_finite=False):
+        self.tol = tol
+        self.divergence_window = divergence_window
+        self.cycle_period = cycle_period
+        self.check_finite = check_finite
+        # Ring buffers with the recent errors and iterates
+        self.errors = deque(maxlen=max(divergence_window, cycle_period) + 1)
+        self.iterates = deque(maxlen=2 * cycle_period)
+
+    def check(self, x, error, x_next):
+        """Returns the termination reason, or None if the iteration can continue."""
+        if self.check_finite and not (cmath.isfinite(x_next) and cmath.isfinite(error)):
+            return "non_finite"
+
+        errors = self.errors
+        errors.append(error)
+        if self.divergence_window and len(errors) > self.divergence_window:
+            window = list(errors)[-self.divergence_window - 1:]
+            if all(e0 < e1 for e0, e1 in zip(window, window[1:])):
+                return "diverging"
+
+        iterates = self.iterates
+        iterates.append(x)
+        for k in range(2, self.cycle_period + 1):
+            if len(iterates) < 2 * k:
+                break
+            if errors[-1] >= errors[-1 - k] and all(
+                abs(iterates[-1 - j] - iterates[-1 - j - k]) < self.tol
+                for j in range(k)
+            ):
+                return f"cycle_{k}"
+        return None
+
+
+def fixed_point_method(
+    expr,
+    p0,
+    tol=1e-6,
+    max_iter=100,
+    accelerate="none",
+    divergence_window=0,
+    cycle_period=0,
+    check_finite=False,
+    full_output=False,
+):
     """
     Implements the fixed-point iteration method to find a fixed point of the function g.
     Modified based on numerical analysis 2024-2 UNALmed course.
@@ -12,26 +75,284 @@ def fixed_point_method(expr, p0, tol=1e-6, max_iter=100):
     - p0: Initial approximation.
     - tol: Tolerance for the convergence criterion.
     - max_iter: Maximum number of iterations allowed.
+    - accelerate: "none" for the plain iteration, "aitken" to apply Aitken's
+      delta-squared process to the iterates, or "steffensen" for Steffensen's method.
+    - divergence_window: Stop when the error grows over this many consecutive
+      iterations (0 disables the detector).
+    - cycle_period: Stop when the iterates repeat with a period up to this
+      value (0 disables the detector).
+    - check_finite: Stop as soon as an iterate is NaN or infinite.
+    - full_output: If True, the termination reason is also returned.
 
     Returns:
-    - tuple: (converges, iterations) where:
+    - tuple: (converges, iterations) or (converges, iterations, reason) where:
         - converges: Boolean indicating if the method converged
-        - iterations: List of dictionaries containing iteration data
+        - iterations: IterationHistory with the iteration data; indexing it
+          returns {"n", "x", "error"} dictionaries as the former list did
+        - reason: "converged", "max_iter", "overflow", "domain", or the
+          reason given by an EarlyExit detector
     """
+    detector = None
+    if divergence_window or cycle_period or check_finite:
+        detector = EarlyExit(tol, divergence_window, cycle_period, check_finite)
+
+    if accelerate == "aitken":
+        result = aitken_method(expr, p0, tol, max_iter, detector, full_output=True)
+    elif accelerate == "steffensen":
+        result = steffensen_method(expr, p0, tol, max_iter, detector, full_output=True)
+    elif accelerate == "none":
+        result = plain_method(expr, p0, tol, max_iter, detector)
+    else:
+        raise ValueError(
+            f"Acceleration must be one of {', '.join(ACCELERATION_MODES)}"
+        )
+
+    return result if full_output else result[:2]
+
+
+def plain_method(expr, p0, tol=1e-6, max_iter=100, detector=None):
+    """
+    Plain fixed-point iteration p_n+1 = g(p_n).
+    Returns tuple (converges, iterations, reason), see fixed_point_method.
+    """
+    g = compile_expression(expr)
     p = p0
-    iterations = []
+    iterations = IterationHistory(capacity=min(max_iter, 64))
 
     for n in range(1, max_iter + 1):
         try:
-            p_next = eval(expr, {"x": p, "math": math})
+            p_next = g(p)
             error = abs(p_next - p)
 
-            iterations.append({"n": n, "x": p, "error": error})
+            iterations.append(p, error)
 
             if error < tol:
-                return True, iterations
+                return True, iterations, "converged"
+            if detector is not None:
+                reason = detector.check(p, error, p_next)
+                if reason:
+                    return False, iterations, reason
             p = p_next
-        except (OverflowError, ValueError):
-            return False, iterations
+        except OverflowError:
+            return False, iterations, "overflow"
+        except ValueError:
+            return False, iterations, "domain"
+
+    return False, iterations, "max_iter"
+
+
+def aitken_method(expr, p0, tol=1e-6, max_iter=100, detector=None, full_output=False):
+    """
+    Fixed-point iteration accelerated with Aitken's delta-squared process.
+    Every iteration evaluates g once; once three consecutive iterates
+    p_n, p_n+1, p_n+2 are known the approximation is replaced by
+    p_n - (p_n+1 - p_n)^2 / (p_n+2 - 2 p_n+1 + p_n).
+
+    Returns the same tuple as fixed_point_method.
+    Besides "x" and "error", the history stores "g_error", the
+    plain fixed-point error |g(p) - p|, and "rate", the ratio of
+    consecutive plain errors.
+    """
+    g = compile_expression(expr)
+    p = p0
+    approximation = p0
+    previous = []  # Last two iterates of the plain sequence
+    previous_g_error = 0
+    iterations = IterationHistory(
+        ("x", "error", "g_error", "rate"), capacity=min(max_iter, 64)
+    )
+    reason = "max_iter"
+
+    for n in range(1, max_iter + 1):
+        try:
+            p_next = g(p)
+            g_error = abs(p_next - p)
+
+            previous.append(p)
+            if len(previous) == 2:
+                p_0, p_1 = previous
+                denominator = p_next - 2 * p_1 + p_0
+                next_approximation = (
+                    p_0 - (p_1 - p_0) ** 2 / denominator if denominator != 0 else p_next
+                )
+                previous.pop(0)
+            else:
+                next_approximation = p_next
+            error = abs(next_approximation - approximation)
+
+            iterations.append(
+                approximation,
+                error,
+                g_error,
+                g_error / previous_g_error if previous_g_error else 0,
+            )
+
+            if error < tol:
+                reason = "converged"
+                break
+            if detector is not None:
+                reason = detector.check(approximation, error, next_approximation)
+                if reason:
+                    break
+                reason = "max_iter"
+            approximation = next_approximation
+            previous_g_error = g_error
+            p = p_next
+        except OverflowError:
+            reason = "overflow"
+            break
+        except ValueError:
+            reason = "domain"
+            break
+
+    converges = reason == "converged"
+    return (converges, iterations, reason) if full_output else (converges, iterations)
+
+
+def steffensen_method(expr, p0, tol=1e-6, max_iter=100, detector=None, full_output=False):
+    """
+    Steffensen's method: every iteration evaluates p1 = g(p) and p2 = g(p1)
+    and moves to p - (p1 - p)^2 / (p2 - 2 p1 + p), which converges
+    quadratically where the plain iteration converges linearly.
+
+    Returns the same tuple as fixed_point_method.
+    Besides "x" and "error", the history stores "g_error", the
+    plain fixed-point error |g(p) - p|, and "rate", the ratio
+    |p2 - p1| / |p1 - p| of the plain steps.
+    """
+    g = compile_expression(expr)
+    p = p0
+    iterations = IterationHistory(
+        ("x", "error", "g_error", "rate"), capacity=min(max_iter, 64)
+    )
+    reason = "max_iter"
+
+    for n in range(1, max_iter + 1):
+        try:
+            p1 = g(p)
+            p2 = g(p1)
+            denominator = p2 - 2 * p1 + p
+            p_next = p - (p1 - p) ** 2 / denominator if denominator != 0 else p2
+            error = abs(p_next - p)
+            g_error = abs(p1 - p)
+
+            iterations.append(p, error, g_error, abs(p2 - p1) / g_error if g_error else 0)
+
+            if error < tol:
+                reason = "converged"
+                break
+            if detector is not None:
+                reason = detector.check(p, error, p_next)
+                if reason:
+                    break
+                reason = "max_iter"
+            p = p_next
+        except OverflowError:
+            reason = "overflow"
+            break
+        except ValueError:
+            reason = "domain"
+            break
+
+    converges = reason == "converged"
+    return (converges, iterations, reason) if full_output else (converges, iterations)
+
+
+def lane_by_lane(g):
+    """
+    Wraps a scalar g(x) so that it takes an array of iterates and returns an
+    array of floats. Overflow, domain errors and complex values become NaN,
+    which stops the lane as in the vectorized evaluation.
+    """
+    def evaluate(p):
+        values = np.empty(len(p))
+        for i, x in enumerate(p.tolist()):
+            try:
+                value = g(x)
+            except (OverflowError, ValueError, ZeroDivisionError):
+                value = np.nan
+            values[i] = np.nan if isinstance(value, complex) else value
+        return values
+
+    return evaluate
+
+
+def fixed_point_batch(expr, p0_array, tol=1e-6, max_iter=100, history=False):
+    """
+    Runs the fixed-point iteration of g(x) for many initial points at once.
+    g is evaluated on a NumPy array (`math.*` functions are mapped to their
+    NumPy counterparts, see expressions.VECTOR_MATH) and every lane is masked
+    out as soon as it converges or its iterate stops being finite (overflow
+    or domain error). If g uses a math function without a NumPy counterpart
+    (e.g. math.gamma), it is evaluated lane by lane with the scalar math.
+
+    Parameters:
+    - expr: String expression of the function g(x)
+    - p0_array: Array-like of initial approximations.
+    - tol: Tolerance for the convergence criterion.
+    - max_iter: Maximum number of iterations allowed.
+    - history: If True, the iterates and errors of every lane are stored.
+
+    Returns:
+    - dict with one entry per lane in each array:
+        - converged: Boolean array indicating if each lane converged
+        - iterations: Number of iterations performed by each lane
+        - error: Last error of each lane (NaN if no iteration was done)
+        - x: Last iterate of each lane
+        - history: Only if requested, dict with "x" and "error" arrays of
+          shape (max_iter, lanes); entries after a lane stops are NaN
+    """
+    try:
+        g = compile_expression(expr, vectorized=True)
+    except VectorizationError:
+        g = lane_by_lane(compile_expression(expr))
+    p = np.array(p0_array, dtype=float, ndmin=1)
+    lanes = p.size
+
+    converged = np.zeros(lanes, dtype=bool)
+    iterations = np.zeros(lanes, dtype=int)
+    errors = np.full(lanes, np.nan)
+    active = np.arange(lanes)
+
+    if history:
+        x_history = np.full((max_iter, lanes), np.nan)
+        error_history = np.full((max_iter, lanes), np.nan)
+
+    with np.errstate(all="ignore"):
+        for n in range(1, max_iter + 1):
+            if active.size == 0:
+                break
+            p_active = p[active]
+            p_next = np.broadcast_to(
+                np.asarray(g(p_active), dtype=float), p_active.shape
+            )
+            error = np.abs(p_next - p_active)
+
+            # Lanes whose iterate overflowed or left the domain stop here,
+            # without recording the failed iteration
+            finite = np.isfinite(p_next)
+            active = active[finite]
+            p_active = p_active[finite]
+            p_next = p_next[finite]
+            error = error[finite]
+
+            iterations[active] = n
+            errors[active] = error
+            if history:
+                x_history[n - 1, active] = p_active
+                error_history[n - 1, active] = error
+
+            done = error < tol
+            converged[active[done]] = True
+            p[active[~done]] = p_next[~done]
+            active = active[~done]
 
-    return False, iterations
+    result = {
+        "converged": converged,
+        "iterations": iterations,
+        "error": errors,
+        "x": p,
+    }
+    if history:
+        result["history"] = {"x": x_history, "error": error_history}
+    return result
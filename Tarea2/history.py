@@ -0,0 +1,104 @@
+import numpy as np
+
+
+class IterationHistory:
+    """
+    Compact record of the iterations of the fixed point method.
+    Every field ("x", "error", ...) is stored in a preallocated float64 NumPy
+    buffer that doubles its capacity when full, instead of one dictionary per
+    iteration. A buffer becomes complex128 when a complex value is appended
+    to it, since the iterates of g can leave the real line (e.g. x**0.5 - 2).
+    The iteration number n is implicit (1, 2, ...).
+
+    The columns are exposed as NumPy views (history.x, history.error,
+    history.column(name)). For compatibility with the previous list of
+    dictionaries, indexing and iteration return {"n", "x", "error", ...}
+    dictionaries.
+    """
+
+    __slots__ = ("fields", "_buffers", "_size")
+
+    def __init__(self, fields=("x", "error"), capacity=64):
+        self.fields = tuple(fields)
+        self._buffers = [np.empty(max(capacity, 1)) for _ in self.fields]
+        self._size = 0
+
+    def append(self, *values):
+        """Adds one iteration, with one value per field in order."""
+        if self._size == len(self._buffers[0]):
+            self._grow()
+        for i, value in enumerate(values):
+            buffer = self._buffers[i]
+            if isinstance(value, (complex, np.complexfloating)) and buffer.dtype.kind != "c":
+                buffer = self._buffers[i] = buffer.astype(complex)
+            buffer[self._size] = value
+        self._size += 1
+
+    def _grow(self):
+        capacity = max(2 * len(self._buffers[0]), 1)
+        for i, buffer in enumerate(self._buffers):
+            grown = np.empty(capacity, dtype=buffer.dtype)
+            grown[: self._size] = buffer[: self._size]
+            self._buffers[i] = grown
+
+    def column(self, name):
+        """Returns a view with the values of one field for every iteration."""
+        return self._buffers[self.fields.index(name)][: self._size]
+
+    @property
+    def n(self):
+        return np.arange(1, self._size + 1)
+
+    @property
+    def x(self):
+        return self.column("x")
+
+    @property
+    def error(self):
+        return self.column("error")
+
+    def to_dicts(self):
+        """Returns the iterations as a list of dictionaries."""
+        return list(self)
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._size))]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("iteration index out of range")
+        iteration = {"n": index + 1}
+        for name, buffer in zip(self.fields, self._buffers):
+            value = buffer[index].item()
+            # Values appended before the buffer became complex were real
+            if isinstance(value, complex) and value.imag == 0:
+                value = value.real
+            iteration[name] = value
+        return iteration
+
+    def __iter__(self):
+        for i in range(self._size):
+            yield self[i]
+
+    def __eq__(self, other):
+        if not isinstance(other, IterationHistory):
+            return NotImplemented
+        return self.fields == other.fields and all(
+            np.array_equal(self.column(name), other.column(name), equal_nan=True)
+            for name in self.fields
+        )
+
+    def __repr__(self):
+        return f"IterationHistory({self._size} iterations, fields={self.fields})"
+
+    def __getstate__(self):
+        # Only the used part of the buffers is pickled
+        return self.fields, [self.column(name).copy() for name in self.fields]
+
+    def __setstate__(self, state):
+        self.fields, self._buffers = state
+        self._size = len(self._buffers[0]) if self._buffers else 0
@@ -1,36 +1,169 @@
 import sys
 import argparse
+import zipfile
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from validators import (
     validate_input_file,
     validate_output_file,
     validate_tolerance,
     validate_max_iterations,
-    validate_file_content,
+    validate_workers,
+    validate_window,
+    validate_archive_file,
+    validate_line,
 )
-from fixed_point_method import fixed_point_method
+from fixed_point_method import fixed_point_method, ACCELERATION_MODES
+from history import IterationHistory
+from expressions import raised_in_expression
+import numpy as np
 import math
 
 
+def iter_functions(filename):
+    """
+    Reads functions from input file one line at a time. Each line should contain:
+    name;expression;initial_point
+    Every line is validated and parsed in the same pass.
+    Yields dictionaries with function details
+    """
+    with open(filename, "r") as infile:
+        for line_counter, line in enumerate(infile, start=1):
+            parsed = validate_line(line, line_counter)
+            if parsed is None:
+                continue
+            name, expr, p0 = parsed
+            yield {"name": name, "expr": expr, "p0": p0}
+
+
 def read(filename):
     """
     Reads functions from input file. Each line should contain:
     name;expression;initial_point
     Returns list of dictionaries with function details
     """
-    validate_file_content(filename)
-    functions = []
-    with open(filename, "r") as infile:
-        for line in infile:
-            if line.strip():  # Skip empty lines
-                name, expr, p0 = line.strip().split(";")
-                functions.append(
-                    {
-                        "name": name,
-                        "expr": expr,
-                        "p0": float(p0),
-                    }
+    return list(iter_functions(filename))
+
+
+# Errors of g(x) that make a function non-convergent, see solve_function
+EVALUATION_ERRORS = (ZeroDivisionError, OverflowError, ValueError, TypeError)
+
+
+def solve_function(func, tolerance, max_iterations, accelerate="none", detectors=None):
+    """
+    Applies the fixed point method to one function read from the input file.
+    Errors raised while evaluating the expression (e.g. a division by zero,
+    see EVALUATION_ERRORS) mark the function as non-convergent instead of
+    stopping the whole run; any other error propagates.
+    detectors: dictionary with the early-exit options of fixed_point_method
+    (divergence_window, cycle_period, check_finite)
+    Returns dictionary with name, expression, initial point, convergence
+    status, termination reason and iterations
+    """
+    try:
+        converged, iterations, reason = fixed_point_method(
+            func["expr"],
+            func["p0"],
+            tol=tolerance,
+            max_iter=max_iterations,
+            accelerate=accelerate,
+            full_output=True,
+            **(detectors or {}),
+        )
+    except EVALUATION_ERRORS as error:
+        # Only errors of g itself; wrong arguments (e.g. detectors) propagate
+        if not raised_in_expression(error):
+            raise
+        converged, iterations, reason = False, IterationHistory(), "error"
+    result = {
+        "name": func["name"],
+        "expr": func["expr"],
+        "p0": func["p0"],
+        "converged": converged,
+        "reason": reason,
+        "iterations": iterations,
+    }
+    if accelerate != "none" and converged:
+        result["saved_iterations"] = estimate_saved_iterations(
+            iterations, tolerance, max_iterations
+        )
+    return result
+
+
+def solve_chunk(functions, tolerance, max_iterations, accelerate="none", detectors=None):
+    """Applies solve_function to a chunk of functions inside a worker process."""
+    return [
+        solve_function(func, tolerance, max_iterations, accelerate, detectors)
+        for func in functions
+    ]
+
+
+def solve_stream(
+    functions,
+    tolerance,
+    max_iterations,
+    workers=1,
+    chunksize=64,
+    accelerate="none",
+    detectors=None,
+):
+    """
+    Applies the fixed point method to every function of an iterable and
+    yields the results in the same order as the input.
+    With more than one worker the functions are sent in chunks to a process
+    pool; only the expression strings travel to the workers, which compile
+    them locally. At most two chunks per worker are pending at any time, so
+    memory does not grow with the number of functions.
+    """
+    if workers == 1:
+        for func in functions:
+            yield solve_function(func, tolerance, max_iterations, accelerate, detectors)
+        return
+
+    functions = iter(functions)
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while True:
+            while len(pending) < 2 * workers:
+                chunk = list(islice(functions, chunksize))
+                if not chunk:
+                    break
+                pending.append(
+                    executor.submit(
+                        solve_chunk,
+                        chunk,
+                        tolerance,
+                        max_iterations,
+                        accelerate,
+                        detectors,
+                    )
                 )
-    return functions
+            if not pending:
+                return
+            yield from pending.popleft().result()
+
+
+def solve(
+    functions, tolerance, max_iterations, workers=1, accelerate="none", detectors=None
+):
+    """
+    Applies the fixed point method to every function.
+    Results are returned in the same order as the input.
+    """
+    chunksize = max(1, len(functions) // (workers * 4))
+    return list(
+        solve_stream(
+            functions,
+            tolerance,
+            max_iterations,
+            workers=workers,
+            chunksize=chunksize,
+            accelerate=accelerate,
+            detectors=detectors,
+        )
+    )
 
 
 def calculate_convergence_rate(errors):
@@ -38,98 +171,252 @@ def calculate_convergence_rate(errors):
     Calculates the average convergence rate using the ratio of consecutive errors.
     Rate = |e_n+1 / e_n|
     Returns average of all rates or 0 if not enough data points.
+    errors: sequence or NumPy array (e.g. IterationHistory.error)
     """
+    errors = np.asarray(errors, dtype=float)
     if len(errors) < 2:
         return 0
     # Calculate average convergence rate using consecutive errors
-    rates = []
-    for i in range(1, len(errors)):
-        if errors[i - 1] == 0:  # Avoid division by zero
-            continue
-        rate = abs(errors[i] / errors[i - 1])
-        rates.append(rate)
-    return sum(rates) / len(rates) if rates else 0
+    previous, current = errors[:-1], errors[1:]
+    nonzero = previous != 0  # Avoid division by zero
+    if not nonzero.any():
+        return 0
+    return float(np.mean(np.abs(current[nonzero] / previous[nonzero])))
+
+
+def calculate_convergence_order(errors):
+    """
+    Estimates the order of convergence q from the last three errors, using
+    e_n+1 ~ C e_n^q, so q = log(e_n+1 / e_n) / log(e_n / e_n-1).
+    Returns 0 if not enough non-zero errors are available.
+    """
+    errors = np.asarray(errors, dtype=float)
+    errors = errors[errors > 0]
+    if len(errors) < 3:
+        return 0
+    e0, e1, e2 = errors[-3:]
+    if e0 == e1:
+        return 0
+    return math.log(e2 / e1) / math.log(e1 / e0)
+
+
+def estimate_saved_iterations(iterations, tolerance, max_iterations):
+    """
+    Estimates how many iterations an accelerated run saved with respect to
+    the plain fixed-point iteration. The plain errors shrink like
+    |g(p0) - p0| * rate^n, so the plain method needs about
+    1 + log(tol / |g(p0) - p0|) / log(rate) iterations (at most max_iterations),
+    where rate is the last linear rate observed by the accelerated run.
+    Returns None when the rate does not allow an estimate.
+    """
+    rates = iterations.column("rate")
+    rates = rates[(rates > 0) & (rates < 1)]
+    if not len(rates):
+        return None
+    first_error = iterations.column("g_error")[0]
+    if first_error < tolerance:
+        return 0
+    plain_iterations = 1 + math.ceil(math.log(tolerance / first_error) / math.log(rates[-1]))
+    return max(min(plain_iterations, max_iterations) - len(iterations), 0)
+
+
+# Row formats indexed by 2 * (x uses scientific notation) + (error uses scientific notation)
+ROW_FORMATS = np.array(
+    [
+        "%4d %25.6f %25.6f\n",
+        "%4d %25.6f %25.6e\n",
+        "%4d %25.6e %25.6f\n",
+        "%4d %25.6e %25.6e\n",
+    ]
+)
+
 
+def format_number(value):
+    """Formats one table value, in scientific notation if it is too large or too small."""
+    if abs(value) > 1e6 or abs(value) < 1e-6:
+        return f"{value:25.6e}"
+    return f"{value:25.6f}"
 
-def write(filename, results):
+
+def format_iterations(iterations):
+    """
+    Formats the iteration table of one function as a single string.
+    Numbers use scientific notation if they are too large or too small.
+    The notation of every row is chosen with array operations and the
+    whole table is rendered by one %-formatting call.
+    """
+    header = f"{'n':>4} {'x':>25} {'error':>25}\n" + "-" * 55 + "\n"
+    if not len(iterations):
+        return header
+
+    x = iterations.x
+    error = iterations.error
+    if np.iscomplexobj(x):
+        # %-formatting has no complex conversion: format the rows one by one.
+        # Iterates with no imaginary part (those before g left the real line) stay real
+        x_values = [x_val.real if x_val.imag == 0 else x_val for x_val in x.tolist()]
+        return header + "".join(
+            f"{n:4d} {format_number(x_val)} {format_number(error_val)}\n"
+            for n, x_val, error_val in zip(iterations.n.tolist(), x_values, error.tolist())
+        )
+    with np.errstate(invalid="ignore"):
+        x_scientific = (np.abs(x) > 1e6) | (np.abs(x) < 1e-6)
+        error_scientific = (np.abs(error) > 1e6) | (np.abs(error) < 1e-6)
+    template = "".join(ROW_FORMATS[2 * x_scientific + error_scientific].tolist())
+    values = np.column_stack((iterations.n, x, error)).ravel().tolist()
+    return header + template % tuple(values)
+
+
+def write_iterations(result, archive=None):
+    """
+    Writes the detailed iterations of one function to its own {name}.txt file,
+    or as the {name}.txt member of an open zipfile.ZipFile archive.
+    """
+    table = format_iterations(result["iterations"])
+    if archive is None:
+        with open(f"{result['name']}.txt", "w") as f:
+            f.write(table)
+    else:
+        archive.writestr(f"{result['name']}.txt", table)
+
+
+def open_archive(archive):
+    """
+    Opens the .zip archive that holds every iteration table, one member per
+    function. The zip central directory indexes the members, so any table can
+    be read without scanning the others. Members are stored uncompressed to
+    keep writing fast. Without archive nothing is opened.
+    """
+    if archive is None:
+        return nullcontext()
+    return zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED)
+
+
+def write_summary_header(f, accelerate="none", termination=False):
+    """
+    Writes the column headers of the summary file.
+    Accelerated runs have two extra columns: observed convergence order and
+    estimated iterations saved. With termination=True the termination reason
+    is added as the last column.
+    """
+    # Headers with appropriate spacing
+    headers = [
+        "nombre_funcion",
+        "expresion_funcion",
+        "punto_inicial",
+        "converge",
+        "velocidad",
+    ]
+    line = f"{headers[0]:<20}\t{headers[1]:<30}\t{headers[2]:>12}\t{headers[3]:>8}\t{headers[4]:>12}"
+    if accelerate != "none":
+        line += f"\t{'orden':>8}\t{'iter_ahorradas':>14}"
+    if termination:
+        line += "\tterminacion"
+    f.write(line + "\n")
+
+
+def write_summary_row(f, result, accelerate="none", termination=False):
+    """
+    Writes the summary row of one function: name, expression, initial point,
+    convergence status and convergence rate. Accelerated runs also report the
+    observed convergence order and the estimated iterations saved, and with
+    termination=True the termination reason is reported too.
+    """
+    converged = result["converged"]
+
+    # Calculate convergence rate only if the function converged
+    velocity = "--"
+    if converged:
+        errors = result["iterations"].error
+        velocity = calculate_convergence_rate(errors)
+        velocity = f"{velocity:>12.6f}"
+    else:
+        velocity = f"{velocity:>12}"
+
+    # Format each field with fixed width
+    line = (
+        f"{result['name']:<20}\t"
+        f"{result['expr']:<30}\t"
+        f"{result['p0']:>12.6f}\t"
+        f"{str(converged):>8}\t"
+        f"{velocity}"
+    )
+
+    if accelerate != "none":
+        order, saved = "--", "--"
+        if converged:
+            errors = result["iterations"].error
+            order = f"{calculate_convergence_order(errors):.4f}"
+            if result.get("saved_iterations") is not None:
+                saved = str(result["saved_iterations"])
+        line += f"\t{order:>8}\t{saved:>14}"
+
+    if termination:
+        line += f"\t{result['reason']}"
+
+    f.write(line + "\n")
+
+
+def write(filename, results, accelerate="none", termination=False, archive=None):
     """
     Writes results in two formats:
-    1. Individual .txt files for each function with detailed iterations
+    1. Individual .txt files for each function with detailed iterations,
+       or all of them as members of one .zip archive if archive is given
     2. Summary file with convergence status and rates for all functions
     
     results: List of dictionaries containing:
         - name: function name
+        - expr: original function expression
+        - p0: initial point
         - iterations: list of iteration data
         - converged: boolean indicating convergence
+        - saved_iterations: only for converged accelerated runs
+        - reason: termination reason, only needed with termination=True
     """
     # Write individual files for each function
-    for result in results:
-        function_name = result["name"]
-        iterations = result["iterations"]
-
-        # Write detailed iterations to function-specific file
-        with open(f"{function_name}.txt", "w") as f:
-            # Header with fixed column widths
-            f.write(f"{'n':>4} {'x':>25} {'error':>25}\n")
-            f.write("-" * 55 + "\n")  # Add separator line
-            for iter_data in iterations:
-                # Format numbers using scientific notation for large values
-                x_val = iter_data["x"]
-                error_val = iter_data["error"]
-
-                # Use scientific notation if number is too large or too small
-                x_str = (
-                    f"{x_val:25.6e}"
-                    if abs(x_val) > 1e6 or abs(x_val) < 1e-6
-                    else f"{x_val:25.6f}"
-                )
-                error_str = (
-                    f"{error_val:25.6e}"
-                    if abs(error_val) > 1e6 or abs(error_val) < 1e-6
-                    else f"{error_val:25.6f}"
-                )
-
-                f.write(f"{iter_data['n']:4d} {x_str} {error_str}\n")
+    with open_archive(archive) as zip_file:
+        for result in results:
+            write_iterations(result, zip_file)
 
     # Write summary file
     with open(filename, "w") as f:
-        # Headers with appropriate spacing
-        headers = [
-            "nombre_funcion",
-            "expresion_funcion",
-            "punto_inicial",
-            "converge",
-            "velocidad",
-        ]
-        f.write(
-            f"{headers[0]:<20}\t{headers[1]:<30}\t{headers[2]:>12}\t{headers[3]:>8}\t{headers[4]:>12}\n"
-        )
-
+        write_summary_header(f, accelerate, termination)
         for result in results:
-            function_name = result["name"]
-            converged = result["converged"]
-            iterations = result["iterations"]
-
-            # Calculate convergence rate only if the function converged
-            velocity = "--"
-            if converged:
-                errors = [iter_data["error"] for iter_data in iterations]
-                velocity = calculate_convergence_rate(errors)
-                velocity = f"{velocity:>12.6f}"
-            else:
-                velocity = f"{velocity:>12}"
-
-            # Get original function expression and initial point
-            func_data = next(f for f in functions if f["name"] == function_name)
-
-            # Format each field with fixed width
-            f.write(
-                f"{function_name:<20}\t"
-                f"{func_data['expr']:<30}\t"
-                f"{func_data['p0']:>12.6f}\t"
-                f"{str(converged):>8}\t"
-                f"{velocity}\n"
-            )
+            write_summary_row(f, result, accelerate, termination)
+
+
+def process(
+    input_file,
+    output_file,
+    tolerance,
+    max_iterations,
+    workers=1,
+    accelerate="none",
+    detectors=None,
+    archive=None,
+):
+    """
+    Streaming pipeline: reads, validates and solves the functions of the
+    input file one at a time, writing each summary row and per-function file
+    as soon as its result is available. Only the functions in flight are kept
+    in memory, so memory use does not depend on the size of the input file.
+    When early-exit detectors are enabled the summary reports the
+    termination reason of each function. If archive is given the iteration
+    tables are written to that .zip file instead of one file per function.
+    """
+    termination = any((detectors or {}).values())
+    with open(output_file, "w") as f, open_archive(archive) as zip_file:
+        write_summary_header(f, accelerate, termination)
+        for result in solve_stream(
+            iter_functions(input_file),
+            tolerance,
+            max_iterations,
+            workers=workers,
+            accelerate=accelerate,
+            detectors=detectors,
+        ):
+            write_iterations(result, zip_file)
+            write_summary_row(f, result, accelerate, termination)
 
 
 if __name__ == "__main__":
@@ -149,6 +436,37 @@ if __name__ == "__main__":
         required=True,
         help="Max number of iterations",
     )
+    parser.add_argument(
+        "-w", "--workers", type=str, default="1", help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--accelerate",
+        choices=ACCELERATION_MODES,
+        default="none",
+        help="Acceleration of the fixed point iteration",
+    )
+    parser.add_argument(
+        "--divergence-window",
+        type=str,
+        default="0",
+        help="Stop when the error grows over this many iterations (0 disables)",
+    )
+    parser.add_argument(
+        "--cycle-period",
+        type=str,
+        default="0",
+        help="Stop when the iterates repeat with period up to this value (0 disables)",
+    )
+    parser.add_argument(
+        "--archive",
+        type=str,
+        help="Write every iteration table into this .zip file instead of one file per function",
+    )
+    parser.add_argument(
+        "--check-finite",
+        action="store_true",
+        help="Stop when an iterate is NaN or infinite",
+    )
     args = parser.parse_args()
 
     try:
@@ -157,26 +475,26 @@ if __name__ == "__main__":
         validate_output_file(args.output)
         tolerance = validate_tolerance(args.tolerance)
         max_iterations = validate_max_iterations(args.max_iterations)
+        workers = validate_workers(args.workers)
+        if args.archive is not None:
+            validate_archive_file(args.archive)
+        detectors = {
+            "divergence_window": validate_window(args.divergence_window, "Divergence window"),
+            "cycle_period": validate_window(args.cycle_period, "Cycle period"),
+            "check_finite": args.check_finite,
+        }
 
-        # Read functions from input file
-        functions = read(args.input)
-
-        # Process each function
-        results = []
-        for func in functions:
-            # Apply fixed point method and store results
-            converged, iterations = fixed_point_method(
-                func["expr"], 
-                func["p0"], 
-                tol=tolerance, 
-                max_iter=max_iterations
-            )
-            results.append(
-                {"name": func["name"], "converged": converged, "iterations": iterations}
-            )
-
-        # Write results to output file
-        write(args.output, results)
+        # Read, solve and write each function as it is streamed from the input file
+        process(
+            args.input,
+            args.output,
+            tolerance,
+            max_iterations,
+            workers=workers,
+            accelerate=args.accelerate,
+            detectors=detectors,
+            archive=args.archive,
+        )
 
     except Exception as e:
         print(f"Error: {str(e)}")
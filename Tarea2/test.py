@@ -1,7 +1,12 @@
-from fixed_point_method import fixed_point_method
-import os, sys
-from punto_fijo import read
-from validators import validate_input_file, validate_tolerance, validate_max_iterations
+from fixed_point_method import fixed_point_method, fixed_point_batch
+import os, sys, tempfile, types
+from punto_fijo import read, solve, iter_functions, process, write, format_iterations
+import zipfile
+from validators import validate_input_file, validate_tolerance, validate_max_iterations, validate_workers, validate_window
+from expressions import compile_expression, VectorizationError
+import numpy as np
+from history import IterationHistory
+import pickle
 import unittest
 
 class TestMethods(unittest.TestCase):
@@ -37,12 +42,184 @@ class TestMethods(unittest.TestCase):
         self.assertEqual(len(iterations) < 100, False)
         self.assertEqual(iterations[-1]['error'] < tol, False)
 
+    def test_fixed_point_accelerated(self):
+        # Linearly convergent g: accelerated runs need far fewer iterations
+        tol = 1e-8
+        num_iter = 1000
+        _, plain = fixed_point_method('0.9*x+0.1', 0, tol, num_iter)
+        for accelerate in ('aitken', 'steffensen'):
+            converges, iterations = fixed_point_method('0.9*x+0.1', 0, tol, num_iter, accelerate=accelerate)
+            self.assertEqual(converges, True)
+            self.assertEqual(len(iterations) * 10 < len(plain), True)
+            self.assertAlmostEqual(iterations[-1]['x'], 1.0, places=7)
+        with self.assertRaises(ValueError):
+            fixed_point_method('x', 0, tol, num_iter, accelerate='invalid')
+
+    def test_fixed_point_early_exit(self):
+        tol = 1e-6
+        num_iter = 100
+        # Without detectors the termination reason is only reported
+        _, iterations, reason = fixed_point_method('(math.sin(x))', 1, tol, num_iter, full_output=True)
+        self.assertEqual((len(iterations), reason), (100, 'max_iter'))
+        _, _, reason = fixed_point_method('(x**2-6)/12', 1, tol, num_iter, full_output=True)
+        self.assertEqual(reason, 'converged')
+        # Growing error
+        converges, iterations, reason = fixed_point_method('2*x', 1, tol, num_iter, divergence_window=5, full_output=True)
+        self.assertEqual((converges, reason), (False, 'diverging'))
+        self.assertEqual(len(iterations) < 10, True)
+        # Period 2 cycle of the logistic map
+        converges, iterations, reason = fixed_point_method('3.2*x*(1-x)', 0.5, tol, num_iter, cycle_period=4, full_output=True)
+        self.assertEqual((converges, reason), (False, 'cycle_2'))
+        # A slowly converging oscillation is not a cycle
+        converges, _, reason = fixed_point_method('-0.9*x', 1, tol, 1000, cycle_period=4, full_output=True)
+        self.assertEqual((converges, reason), (True, 'converged'))
+        # Infinite iterate
+        _, _, reason = fixed_point_method('2*x', 1e307, tol, num_iter, check_finite=True, full_output=True)
+        self.assertEqual(reason, 'non_finite')
+
+    def test_fixed_point_batch(self):
+        # Every lane must match the scalar method run from the same point
+        initial_points = [1, 0.5, 30]
+        tol = 1e-6
+        num_iter = 100
+        result = fixed_point_batch('(x**2-6)/12', initial_points, tol, num_iter)
+        for i, p0 in enumerate(initial_points):
+            converges, iterations = fixed_point_method('(x**2-6)/12', p0, tol, num_iter)
+            self.assertEqual(result['converged'][i], converges)
+            self.assertEqual(result['iterations'][i], len(iterations))
+            self.assertAlmostEqual(result['error'][i], iterations[-1]['error'])
+
+    def test_fixed_point_batch_history(self):
+        result = fixed_point_batch('math.sin(x)', [1, 0.5], 1e-6, 50, history=True)
+        self.assertEqual(result['history']['x'].shape, (50, 2))
+        self.assertEqual(result['history']['x'][0, 0], 1)
+        self.assertEqual(result['converged'].any(), False)
+
+    def test_fixed_point_batch_scalar_math(self):
+        # Expressions that only work on scalars (math.erf has no NumPy
+        # counterpart, conditionals and builtins like min need one value):
+        # the lanes are evaluated one by one
+        initial_points = [0.0, 2.0, -3.0]
+        expressions = ['math.erf(x)/2 + 0.1', 'min(x,1)/2', 'x/2 if x>0 else -x/2',
+                       'round(x,3)/2', 'float(x)/2', '(x > 1 and 1 or x)/2']
+        for expr in expressions:
+            result = fixed_point_batch(expr, initial_points, 1e-8, 100)
+            for i, p0 in enumerate(initial_points):
+                converges, iterations = fixed_point_method(expr, p0, 1e-8, 100)
+                self.assertEqual(result['converged'][i], converges)
+                self.assertEqual(result['iterations'][i], len(iterations))
+                self.assertEqual(result['error'][i], iterations[-1]['error'])
+        # A domain error stops the lane without recording the iteration
+        result = fixed_point_batch('math.gamma(x)', [0.0, 1.0], 1e-8, 10)
+        self.assertEqual(result['iterations'].tolist(), [0, 1])
+
     def test_input_data(self):
         # Test input data matches expected format
         dir_path = os.path.dirname(os.path.realpath(__file__)) + '/tests/prueba1.txt'
         expected = [{'name': 'func1', 'expr': 'x**2', 'p0': 2.0}]  # match actual format
         self.assertEqual(read(dir_path), expected)
 
+    def test_solve_workers(self):
+        # Parallel results must keep the input order and match the serial ones
+        functions = [
+            {'name': f'func{i}', 'expr': expr, 'p0': p0}
+            for i, (expr, p0) in enumerate(
+                [('(x**2-6)/12', 1.0), ('1/x', 0.0), ('math.cos(x)', 1.0), ('x**2', 2.0)] * 3
+            )
+        ]
+        serial = solve(functions, 1e-6, 100)
+        parallel = solve(functions, 1e-6, 100, workers=2)
+        self.assertEqual(parallel, serial)
+        self.assertEqual([r['name'] for r in parallel], [f['name'] for f in functions])
+        # Division by zero is reported as non-convergent
+        self.assertEqual(parallel[1]['converged'], False)
+
+    def test_solve_errors(self):
+        # Errors of g are reported as non-convergent, wrong arguments propagate
+        functions = [{'name': 'func1', 'expr': '1/(x-1)', 'p0': 1.0},
+                     {'name': 'func2', 'expr': 'x**0.5 if x < 1 else 0', 'p0': -1.0}]
+        results = solve(functions, 1e-6, 100)
+        self.assertEqual([r['reason'] for r in results], ['error', 'error'])
+        with self.assertRaises(TypeError):
+            solve(functions, 1e-6, 100, detectors={'divergence_windw': 5})
+
+    def test_iter_functions(self):
+        dir_path = os.path.dirname(os.path.realpath(__file__)) + '/tests/'
+        functions = iter_functions(dir_path + 'prueba1.txt')
+        self.assertIsInstance(functions, types.GeneratorType)
+        self.assertEqual(list(functions), [{'name': 'func1', 'expr': 'x**2', 'p0': 2.0}])
+        # The first line is valid, the error is raised when the second is reached
+        functions = iter_functions(dir_path + 'prueba2.txt')
+        self.assertEqual(next(functions)['name'], 'func1')
+        with self.assertRaises(ValueError):
+            next(functions)
+
+    def test_process(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                with open('datos.txt', 'w') as f:
+                    f.write('func1;(x**2-6)/12;1\n\nfunc2;math.sin(x);1\n')
+                process('datos.txt', 'resumen.txt', 1e-6, 100)
+                with open('resumen.txt') as f:
+                    lines = f.read().splitlines()
+                self.assertEqual(len(lines), 3)
+                self.assertEqual(lines[1].split()[:4], ['func1', '(x**2-6)/12', '1.000000', 'True'])
+                self.assertEqual(lines[2].split(), ['func2', 'math.sin(x)', '1.000000', 'False', '--'])
+                self.assertTrue(os.path.exists('func1.txt'))
+                self.assertTrue(os.path.exists('func2.txt'))
+            finally:
+                os.chdir(cwd)
+
+    def test_write(self):
+        # write only needs the results, each one carries its expression and initial point
+        results = solve([{'name': 'func1', 'expr': 'x**3', 'p0': 0.5}], 1e-6, 100)
+        self.assertEqual(results[0]['expr'], 'x**3')
+        self.assertEqual(results[0]['p0'], 0.5)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                write('resumen.txt', results)
+                with open('resumen.txt') as f:
+                    lines = f.read().splitlines()
+                self.assertEqual(lines[1].split()[:4], ['func1', 'x**3', '0.500000', 'True'])
+            finally:
+                os.chdir(cwd)
+
+    def test_format_iterations(self):
+        history = IterationHistory()
+        history.append(2.0, 1e-7)
+        history.append(1e7, 0.5)
+        lines = format_iterations(history).splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(lines[2], f"{1:4d} {2.0:25.6f} {1e-7:25.6e}")
+        self.assertEqual(lines[3], f"{2:4d} {1e7:25.6e} {0.5:25.6f}")
+
+    def test_format_iterations_complex(self):
+        history = IterationHistory()
+        history.append(1.0, 2.0)
+        history.append(complex(-1.5, 1e7), 1e-7)
+        lines = format_iterations(history).splitlines()
+        self.assertEqual(lines[2], f"{1:4d} {1.0:25.6f} {2.0:25.6f}")
+        self.assertEqual(lines[3], f"{2:4d} {complex(-1.5, 1e7):25.6e} {1e-7:25.6e}")
+
+    def test_write_archive(self):
+        results = solve([{'name': 'func1', 'expr': 'x**3', 'p0': 0.5}, {'name': 'func2', 'expr': 'math.cos(x)', 'p0': 1.0}], 1e-6, 100)
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as tmp:
+            os.chdir(tmp)
+            try:
+                write('resumen.txt', results, archive='tablas.zip')
+                self.assertEqual(os.path.exists('func1.txt'), False)
+                with zipfile.ZipFile('tablas.zip') as archive:
+                    self.assertEqual(archive.namelist(), ['func1.txt', 'func2.txt'])
+                    table = archive.read('func2.txt').decode()
+                self.assertEqual(table, format_iterations(results[1]['iterations']))
+            finally:
+                os.chdir(cwd)
+
 class TestValidators(unittest.TestCase):
     def setUp(self):
         # Create test files
@@ -74,6 +251,21 @@ class TestValidators(unittest.TestCase):
         with self.assertRaises(ValueError):
             validate_max_iterations("-10")
 
+    def test_validate_workers(self):
+        self.assertEqual(validate_workers("4"), 4)
+        with self.assertRaises(ValueError):
+            validate_workers("invalid")
+        with self.assertRaises(ValueError):
+            validate_workers("0")
+
+    def test_validate_window(self):
+        self.assertEqual(validate_window("0", "Cycle period"), 0)
+        self.assertEqual(validate_window("5", "Cycle period"), 5)
+        with self.assertRaises(ValueError):
+            validate_window("invalid", "Cycle period")
+        with self.assertRaises(ValueError):
+            validate_window("-1", "Cycle period")
+
 class TestConvergenceRate(unittest.TestCase):
     def test_calculate_convergence_rate(self):
         from punto_fijo import calculate_convergence_rate
@@ -89,5 +281,72 @@ class TestConvergenceRate(unittest.TestCase):
         rate = calculate_convergence_rate(errors)
         self.assertAlmostEqual(rate, 0.1, places=2)
 
+    def test_calculate_convergence_order(self):
+        from punto_fijo import calculate_convergence_order
+
+        self.assertEqual(calculate_convergence_order([0.1, 0.01]), 0)
+        # Linear and quadratic error sequences
+        self.assertAlmostEqual(calculate_convergence_order([0.1, 0.01, 0.001]), 1.0)
+        self.assertAlmostEqual(calculate_convergence_order([1e-1, 1e-2, 1e-4]), 2.0)
+
+class TestExpressions(unittest.TestCase):
+    def test_compile_expression(self):
+        g = compile_expression('(x**2-6)/12')
+        self.assertAlmostEqual(g(1), -5/12)
+        self.assertAlmostEqual(compile_expression('math.sin(x)')(0), 0.0)
+
+    def test_compile_expression_is_cached(self):
+        # The same expression text must reuse the same compiled callable
+        self.assertIs(compile_expression('x**3'), compile_expression('x**3'))
+
+    def test_compile_expression_vectorized(self):
+        x = np.array([0.5, 2.0, 8.0])
+        for expr in ('math.log(x, 2)', 'math.log(x)', 'math.tau*x', 'math.atan2(x, 1)', 'math.hypot(x, 3)', 'math.pow(x, 2)', 'abs(x) + pow(x, 2)'):
+            g = compile_expression(expr)
+            np.testing.assert_allclose(compile_expression(expr, vectorized=True)(x), [g(v) for v in x])
+        with self.assertRaises(TypeError):
+            compile_expression('math.sin(x, x)', vectorized=True)(x)
+        for expr in ('math.gamma(x)', 'math.remainder(x, 3)', 'getattr(math, "sin")(x)', 'min(x, 1)', 'x if x > 0 else -x', 'pow(x, 2, 5)'):
+            with self.assertRaises(VectorizationError):
+                compile_expression(expr, vectorized=True)
+
+    def test_compile_expression_invalid(self):
+        with self.assertRaises(SyntaxError):
+            compile_expression('x**')
+
+class TestHistory(unittest.TestCase):
+    def test_history_grows(self):
+        history = IterationHistory(capacity=2)
+        for i in range(10):
+            history.append(i, 1 / (i + 1))
+        self.assertEqual(len(history), 10)
+        self.assertEqual(history.x.tolist(), list(range(10)))
+        self.assertEqual(history.n.tolist(), list(range(1, 11)))
+        self.assertAlmostEqual(history.error[-1], 0.1)
+
+    def test_history_dicts(self):
+        history = IterationHistory(capacity=1)
+        history.append(2.0, 0.5)
+        history.append(1.5, 0.25)
+        self.assertEqual(history[-1], {'n': 2, 'x': 1.5, 'error': 0.25})
+        self.assertEqual(history.to_dicts(), [{'n': 1, 'x': 2.0, 'error': 0.5}, {'n': 2, 'x': 1.5, 'error': 0.25}])
+        with self.assertRaises(IndexError):
+            history[2]
+
+    def test_history_pickle(self):
+        _, iterations = fixed_point_method('math.cos(x)', 1, 1e-6, 100)
+        self.assertEqual(pickle.loads(pickle.dumps(iterations)), iterations)
+
+    def test_history_complex(self):
+        # The iterates of sqrt(x) - 2 leave the real line and converge to a complex fixed point
+        converges, iterations = fixed_point_method('x**0.5 - 2', 1.0, 1e-6, 20)
+        self.assertTrue(converges)
+        self.assertEqual(len(iterations), 16)
+        self.assertEqual(iterations[0], {'n': 1, 'x': 1.0, 'error': 2.0})
+        self.assertIsInstance(iterations[0]['x'], float)
+        self.assertIsInstance(iterations[-1]['x'], complex)
+        self.assertAlmostEqual(iterations[-1]['x'], complex(-1.5, 7 ** 0.5 / 2), places=5)
+        self.assertEqual(iterations.error.dtype, float)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
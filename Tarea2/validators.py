@@ -1,5 +1,5 @@
 import os
-import math
+from expressions import compile_expression
 
 
 def validate_input_file(input_file):
@@ -15,6 +15,11 @@ def validate_output_file(output_file):
     # Additional output file validations can be added here
 
 
+def validate_archive_file(archive_file):
+    if not archive_file.endswith(".zip"):
+        raise ValueError("Archive file must be a .zip file")
+
+
 def validate_tolerance(tolerance_str):
     try:
         tolerance = float(tolerance_str)
@@ -35,46 +40,66 @@ def validate_max_iterations(max_iter_str):
     return max_iterations
 
 
+def validate_workers(workers_str):
+    try:
+        workers = int(workers_str)
+    except ValueError:
+        raise ValueError("Number of workers must be a valid integer")
+    if workers <= 0:
+        raise ValueError("Number of workers must be a positive integer")
+    return workers
+
+
+def validate_window(window_str, name):
+    try:
+        window = int(window_str)
+    except ValueError:
+        raise ValueError(f"{name} must be a valid integer")
+    if window < 0:
+        raise ValueError(f"{name} must be a non-negative integer")
+    return window
+
+
+def validate_line(line, line_counter):
+    """
+    Validate the content format of one line of the input file.
+    Returns tuple (name, expression, initial_point) or None for empty lines
+    """
+    line = line.strip()
+    if not line:  # Skip empty lines
+        return None
+
+    parts = line.split(";")
+    if len(parts) != 3:
+        raise ValueError(
+            f"Invalid format in line {line_counter}. Expected 3 fields separated by semicolons"
+        )
+
+    name, expr, p0 = parts
+
+    # Validate function name (any non-empty string is valid)
+    if not name.strip():
+        raise ValueError(f"Invalid function name in line {line_counter}")
+
+    # Validate initial point
+    try:
+        p0 = float(p0)
+    except ValueError:
+        raise ValueError(f"Invalid initial point '{p0}' in line {line_counter}")
+
+    # Validate expression by trying to evaluate it with x=1
+    try:
+        compile_expression(expr)(1)
+    except (NameError, SyntaxError, TypeError) as e:
+        raise ValueError(
+            f"Input file has an invalid expression '{expr}' in line {line_counter}: {str(e)}"
+        )
+
+    return name, expr, p0
+
+
 def validate_file_content(filename):
     """Validate the content format of the input file"""
-    # Define safe math functions that can be used in expressions
-    safe_dict = {
-        name: getattr(math, name)
-        for name in ["sin", "cos", "tan", "exp", "log", "sqrt"]
-    }
-    safe_dict.update({"abs": abs, "pow": pow})
-
-    line_counter = 0
     with open(filename, "r") as file:
-        for line in file:
-            line_counter += 1
-            line = line.strip()
-            if not line:  # Skip empty lines
-                continue
-
-            parts = line.split(";")
-            if len(parts) != 3:
-                raise ValueError(
-                    f"Invalid format in line {line_counter}. Expected 3 fields separated by semicolons"
-                )
-
-            name, expr, p0 = parts
-
-            # Validate function name (any non-empty string is valid)
-            if not name.strip():
-                raise ValueError(f"Invalid function name in line {line_counter}")
-
-            # Validate initial point
-            try:
-                float(p0)
-            except ValueError:
-                raise ValueError(f"Invalid initial point '{p0}' in line {line_counter}")
-
-            # Validate expression by trying to evaluate it with x=1
-            try:
-                safe_dict["x"] = 1
-                eval(expr, {"x": 1, "math": math})
-            except (NameError, SyntaxError, TypeError) as e:
-                raise ValueError(
-                    f"Input file has an invalid expression '{expr}' in line {line_counter}: {str(e)}"
-                )
+        for line_counter, line in enumerate(file, start=1):
+            validate_line(line, line_counter)
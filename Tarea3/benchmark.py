@@ -0,0 +1,204 @@
+import importlib.util
+import os
+import tempfile
+import timeit
+import numpy as np
+from cubic_spline_interpolation import cubic_spline, evaluate_spline, find_intervals
+from main import AnalysisCache, interval_regressions, read_matrix, render, select_n, update_incremental
+
+
+def evaluate_spline_loop(x_eval, x, coeffs):
+    """Point by point evaluation, as evaluate_spline used to do it."""
+    result = np.zeros_like(x_eval, dtype=float)
+    for i, xi in enumerate(x_eval):
+        idx = np.searchsorted(x, xi) - 1
+        idx = max(0, min(idx, len(x)-2))
+        dx = xi - x[idx]
+        result[i] = (coeffs['a'][idx] +
+                     coeffs['b'][idx] * dx +
+                     coeffs['c'][idx] * dx**2 +
+                     coeffs['d'][idx] * dx**3)
+    return result
+
+
+def benchmark_evaluation(knots=1000, points=1000000):
+    """
+    Compares evaluating the spline point by point against the vectorized
+    evaluate_spline on a large grid.
+    """
+    x = np.linspace(0, 10, knots)
+    coeffs = cubic_spline(x, np.sin(x))
+    x_eval = np.linspace(0, 10, points)
+
+    loop_time = timeit.timeit(lambda: evaluate_spline_loop(x_eval, x, coeffs), number=1)
+    vector_time = timeit.timeit(lambda: evaluate_spline(x_eval, x, coeffs), number=1)
+
+    print(f"{knots} knots, {points} evaluation points")
+    print(f"{'point by point':<30}{loop_time * 1e3:>12.1f} ms")
+    print(f"{'evaluate_spline':<30}{vector_time * 1e3:>12.1f} ms")
+    print(f"{'speedup':<30}{loop_time / vector_time:>12.1f} x")
+
+
+def benchmark_lookup(knots=1000, points=1000000, number=5):
+    """
+    Compares finding the interval of every point with np.searchsorted
+    against find_intervals on equally spaced knots, for points in random
+    order (arithmetic index) and for a linspace grid (contiguous slices).
+    """
+    x = np.linspace(0, 10, knots)
+    grid = np.linspace(-0.5, 10.5, points)
+    shuffled = np.random.default_rng(0).permutation(grid)
+
+    def search(x_eval):
+        idx = np.clip(np.searchsorted(x, x_eval) - 1, 0, len(x)-2)
+        return idx, x_eval - x[idx]
+
+    print(f"{knots} equally spaced knots, {points} evaluation points")
+    for name, x_eval in (('random order', shuffled), ('linspace', grid)):
+        search_time = timeit.timeit(lambda: search(x_eval), number=number) / number
+        lookup_time = timeit.timeit(lambda: find_intervals(x_eval, x), number=number) / number
+        print(f"{f'searchsorted, {name}':<30}{search_time * 1e3:>12.1f} ms")
+        print(f"{f'find_intervals, {name}':<30}{lookup_time * 1e3:>12.1f} ms")
+        print(f"{'speedup':<30}{search_time / lookup_time:>12.1f} x")
+
+
+def benchmark_rendering(columns=8, rows=2000, jobs=(1, 2, 4)):
+    """
+    Measures the figures per second that render writes with different
+    numbers of worker processes.
+    """
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 10, rows)
+    ys = np.sin(x[:, None] + np.arange(columns)) + rng.normal(0, 0.1, (rows, columns))
+    cache = AnalysisCache(x, ys, [f'col{j}' for j in range(columns)])
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            print(f"{columns} columns, {rows} rows")
+            for count in jobs:
+                figures = []
+                elapsed = timeit.timeit(
+                    lambda: figures.extend(render(cache, jobs=count)), number=1
+                )
+                print(f"{f'{count} jobs':<30}{len(figures) / elapsed:>12.1f} figures/s")
+        finally:
+            os.chdir(cwd)
+
+
+def benchmark_bulk(columns=20, rows=2000, dpi=60):
+    """
+    Compares the render time of the default plots against the bulk mode
+    (reused figure, LineCollection, no twin axes or legends, lower dpi).
+    """
+    rng = np.random.default_rng(0)
+    x = np.linspace(0, 10, rows)
+    ys = np.sin(x[:, None] + np.arange(columns)) + rng.normal(0, 0.1, (rows, columns))
+    cache = AnalysisCache(x, ys, [f'col{j}' for j in range(columns)])
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        os.chdir(directory)
+        try:
+            default_time = timeit.timeit(lambda: render(cache), number=1)
+            bulk_time = timeit.timeit(lambda: render(cache, bulk=True, dpi=dpi), number=1)
+        finally:
+            os.chdir(cwd)
+
+    print(f"{columns} columns, {rows} rows")
+    print(f"{'default plots':<30}{default_time * 1e3:>12.1f} ms")
+    print(f"{f'bulk plots, dpi={dpi}':<30}{bulk_time * 1e3:>12.1f} ms")
+    print(f"{'speedup':<30}{default_time / bulk_time:>12.1f} x")
+
+
+def benchmark_ingestion(rows=1000000, columns=4):
+    """
+    Compares parsing a large CSV with the c and pyarrow engines against
+    memory-mapping the .npy sidecar that read_matrix caches.
+    """
+    rng = np.random.default_rng(0)
+    matrix = rng.normal(size=(rows, columns + 1))
+    header = ';'.join(['x'] + [f'col{j}' for j in range(columns)])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'data.csv')
+        np.savetxt(path, matrix, delimiter=';', header=header, comments='', fmt='%.10g')
+
+        engines = ['c'] + (['pyarrow'] if importlib.util.find_spec('pyarrow') else [])
+        print(f"{rows} rows, {columns + 1} columns")
+        for engine in engines:
+            elapsed = timeit.timeit(
+                lambda: read_matrix(path, engine=engine, cache=False), number=1
+            )
+            print(f"{f'parse CSV ({engine})':<30}{elapsed * 1e3:>12.1f} ms")
+        read_matrix(path)  # Writes the sidecar
+        elapsed = timeit.timeit(lambda: read_matrix(path), number=1)
+        print(f"{'memory-mapped sidecar':<30}{elapsed * 1e3:>12.1f} ms")
+
+
+def benchmark_incremental(rows=1000000, appended=1000, columns=4):
+    """
+    Compares reprocessing a large CSV after appending a few rows (parse and
+    every interval regression for n = 6..10) against update_incremental.
+    """
+    rng = np.random.default_rng(0)
+    matrix = rng.uniform(0, 10, size=(rows + appended, columns + 1))
+    matrix[:2, 0] = 0, 10  # Fix the range of x
+    header = ';'.join(['x'] + [f'col{j}' for j in range(columns)])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'data.csv')
+        np.savetxt(path, matrix[:rows], delimiter=';', header=header, comments='', fmt='%.10g')
+        update_incremental(path, range(6, 11))
+        with open(path, 'a') as f:
+            np.savetxt(f, matrix[rows:], delimiter=';', fmt='%.10g')
+
+        def full():
+            names, data = read_matrix(path, cache=False)
+            for n in range(6, 11):
+                interval_regressions(data[:, 0], data[:, 1:], n)
+
+        full_time = timeit.timeit(full, number=1)
+        incremental_time = timeit.timeit(lambda: update_incremental(path, range(6, 11)), number=1)
+
+    print(f"{rows} rows + {appended} appended rows, {columns + 1} columns")
+    print(f"{'full reprocessing':<30}{full_time * 1e3:>12.1f} ms")
+    print(f"{'update_incremental':<30}{incremental_time * 1e3:>12.1f} ms")
+    print(f"{'speedup':<30}{full_time / incremental_time:>12.1f} x")
+
+
+def benchmark_sweep(rows=1000000, columns=4, n_values=range(2, 51)):
+    """
+    Compares scoring every n of a sweep with one interval_regressions pass
+    per n against select_n, which shares one set of prefix sums.
+    """
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, 10, rows)
+    ys = np.sin(x[:, None] + np.arange(columns)) + rng.normal(0, 0.1, (rows, columns))
+
+    per_n_time = timeit.timeit(
+        lambda: [interval_regressions(x, ys, n) for n in n_values], number=1
+    )
+    sweep_time = timeit.timeit(lambda: select_n(x, ys, n_values), number=1)
+
+    print(f"{rows} rows, {columns} columns, {len(n_values)} values of n")
+    print(f"{'regressions per n':<30}{per_n_time * 1e3:>12.1f} ms")
+    print(f"{'select_n':<30}{sweep_time * 1e3:>12.1f} ms")
+    print(f"{'speedup':<30}{per_n_time / sweep_time:>12.1f} x")
+
+
+if __name__ == '__main__':
+    benchmark_evaluation()
+    print()
+    benchmark_lookup()
+    print()
+    benchmark_rendering()
+    print()
+    benchmark_bulk()
+    print()
+    benchmark_ingestion()
+    print()
+    benchmark_incremental()
+    print()
+    benchmark_sweep()
@@ -1,47 +1,48 @@
 import numpy as np
+from scipy.linalg import solve_banded
+
+def per_point(values, coefficients):
+    """
+    Reshape a 1-D array with one value per knot or evaluation point so that
+    it broadcasts against coefficients of several series, shape (n, n_series).
+    """
+    return np.reshape(values, np.shape(values) + (1,)*(np.ndim(coefficients) - 1))
 
 def cubic_spline(x, y):
     """
     Natural cubic spline interpolation.
     Implements the algorithm as described in Burden.
+    Every step is an array operation and the tridiagonal system for c
+    is solved with the banded solver of SciPy.
+    y can be 2-D with shape (n_knots, n_series): every series shares the
+    knots, so the tridiagonal matrix is factorized once for all of them and
+    every coefficient array gets shape (n_knots - 1, n_series).
     """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
     n = len(x) - 1
     
     # Step 1: Calculate h
     h = np.diff(x)
+    h_series = per_point(h, y)
     
-    # Step 2: Calculate alpha
-    alpha = np.zeros(n+1)
-    for i in range(1, n):
-        alpha[i] = 3/h[i]*(y[i+1] - y[i]) - 3/h[i-1]*(y[i] - y[i-1])
-    
-    # Step 3: Initialize diagonal, mu, and z
-    diagonal = np.zeros(n+1)
-    mu = np.zeros(n+1)
-    z = np.zeros(n+1)
-    diagonal[0] = 1
+    # Step 2: Calculate alpha (only the interior equations 1..n-1 are needed)
+    slopes = np.diff(y, axis=0) / h_series
+    alpha = 3 * (slopes[1:] - slopes[:-1])
     
-    # Step 4: Calculate diagonal, mu, z
-    for i in range(1, n):
-        diagonal[i] = 2*(x[i+1] - x[i-1]) - h[i-1]*mu[i-1]
-        mu[i] = h[i]/diagonal[i]
-        z[i] = (alpha[i] - h[i-1]*z[i-1])/diagonal[i]
-    
-    # Step 5: Set final values
-    diagonal[n] = 1
-    z[n] = 0
-    c = np.zeros(n+1)
-    
-    # Step 6: Back substitution
-    for j in range(n-1, -1, -1):
-        c[j] = z[j] - mu[j]*c[j+1]
+    # Steps 3-6: Solve the tridiagonal system for c with c[0] = c[n] = 0
+    #   h[i-1]*c[i-1] + 2*(h[i-1] + h[i])*c[i] + h[i]*c[i+1] = alpha[i]
+    c = np.zeros((n+1,) + y.shape[1:])
+    if n > 1:
+        banded = np.zeros((3, n-1))
+        banded[0, 1:] = h[1:-1]                # Upper diagonal
+        banded[1] = 2*(h[:-1] + h[1:])         # Main diagonal
+        banded[2, :-1] = h[1:-1]               # Lower diagonal
+        c[1:-1] = solve_banded((1, 1), banded, alpha)
         
     # Calculate b and d
-    b = np.zeros(n)
-    d = np.zeros(n)
-    for j in range(n):
-        b[j] = (y[j+1] - y[j])/h[j] - h[j]*(c[j+1] + 2*c[j])/3
-        d[j] = (c[j+1] - c[j])/(3*h[j])
+    b = slopes - h_series*(c[1:] + 2*c[:-1])/3
+    d = (c[1:] - c[:-1])/(3*h_series)
     
     return {
         'a': y[:-1],
@@ -50,27 +51,85 @@ def cubic_spline(x, y):
         'd': d
     }
 
+def is_uniform(x, tol=0.25):
+    """
+    True if the knots x are increasing and every knot lies within tol
+    spacings of its position on the equally spaced grid x0 + k*h, as the
+    interval midpoints of main.py do. The bound is on the position of each
+    knot, not on each spacing, so small spacing errors cannot add up along
+    a long grid: with tol < 1, floor((x - x0)/h) is at most one interval
+    away from the interval that holds x.
+    """
+    x = np.asarray(x, dtype=float)
+    if len(x) < 2:
+        return False
+    spacing = (x[-1] - x[0]) / (len(x) - 1)
+    if not (spacing > 0 and np.all(np.diff(x) > 0)):
+        return False
+    grid = x[0] + np.arange(len(x)) * spacing
+    return bool(np.max(np.abs(x - grid)) <= tol * spacing)
+
+def find_intervals(x_eval, x, uniform=None):
+    """
+    Find the spline interval of every evaluation point. Points outside the
+    knots use the first or last polynomial, and a point on a knot uses the
+    polynomial that ends there, as np.searchsorted(x, x_eval) - 1 does.
+    Returns the interval indices and the offsets x_eval - x[idx].
+    - Sorted x_eval (e.g. a linspace): one searchsorted of the knots into
+      x_eval gives where every interval starts, and each interval's points
+      are a contiguous slice filled with np.repeat.
+    - Equally spaced knots (uniform, detected with is_uniform if None): the
+      index is computed as floor((x_eval - x0)/h) and corrected by at most
+      one interval, comparing with the knots, so it matches the search
+      exactly.
+    - Otherwise one np.searchsorted call over the knots.
+    """
+    x = np.asarray(x, dtype=float)
+    x_eval = np.asarray(x_eval, dtype=float)
+    last = len(x) - 2
+    if x_eval.ndim == 1 and len(x_eval) > 1 and np.all(x_eval[1:] >= x_eval[:-1]):
+        # Interval i holds the points x[i] < x_eval <= x[i+1]
+        bounds = np.searchsorted(x_eval, x[1:-1], side='right')
+        counts = np.diff(bounds, prepend=0, append=len(x_eval))
+        idx = np.repeat(np.arange(last + 1), counts)
+    elif uniform or (uniform is None and is_uniform(x)):
+        idx = np.floor((x_eval - x[0]) * ((last + 1) / (x[-1] - x[0]))).astype(np.intp)
+        idx = np.clip(idx, 0, last)
+        idx = idx - ((x_eval <= x[idx]) & (idx > 0))
+        idx = idx + ((x_eval > x[idx + 1]) & (idx < last))
+    else:
+        idx = np.searchsorted(x, x_eval) - 1
+        idx = np.clip(idx, 0, last)
+    return idx, x_eval - x[idx]
+
 def evaluate_spline(x_eval, x, coeffs):
     """
     Evaluate the cubic spline at given points.
+    For several series the result has shape (len(x_eval), n_series).
     """
-    result = np.zeros_like(x_eval, dtype=float)
+    idx, dx = find_intervals(x_eval, x)
+    dx = per_point(dx, coeffs['a'])
     
-    for i, xi in enumerate(x_eval):
-        # Find the appropriate interval
-        idx = np.searchsorted(x, xi) - 1
-        idx = max(0, min(idx, len(x)-2))
-        
-        # Calculate the difference
-        dx = xi - x[idx]
-        
-        # Evaluate the cubic polynomial
-        result[i] = (coeffs['a'][idx] + 
-                    coeffs['b'][idx] * dx +
-                    coeffs['c'][idx] * dx**2 +
-                    coeffs['d'][idx] * dx**3)
+    # Evaluate the cubic polynomial in Horner form
+    return (coeffs['a'][idx] +
+            dx*(coeffs['b'][idx] +
+                dx*(coeffs['c'][idx] +
+                    dx*coeffs['d'][idx])))
+
+def evaluate_spline_derivatives(x_eval, x, coeffs):
+    """
+    Evaluate the cubic spline and its first and second derivatives at given
+    points in one pass, sharing the interval search.
+    Returns the tuple (values, first derivatives, second derivatives).
+    """
+    idx, dx = find_intervals(x_eval, x)
+    dx = per_point(dx, coeffs['a'])
+    a, b, c, d = (coeffs[k][idx] for k in ('a', 'b', 'c', 'd'))
     
-    return result
+    values = a + dx*(b + dx*(c + dx*d))
+    first = b + dx*(2*c + dx*3*d)
+    second = 2*c + dx*6*d
+    return values, first, second
 
 def cubic_spline_derivative(coeffs):
     """
@@ -89,19 +148,101 @@ def evaluate_spline_derivative(x_eval, x, coeffs):
     """
     Evaluate the derivative of the cubic spline at given points.
     """
-    result = np.zeros_like(x_eval, dtype=float)
+    idx, dx = find_intervals(x_eval, x)
+    dx = per_point(dx, coeffs['a'])
     
-    for i, xi in enumerate(x_eval):
-        # Find the appropriate interval
-        idx = np.searchsorted(x, xi) - 1
-        idx = max(0, min(idx, len(x)-2))
-        
-        # Calculate the difference
-        dx = xi - x[idx]
+    # Evaluate the derivative polynomial in Horner form
+    return (coeffs['a'][idx] +
+            dx*(coeffs['b'][idx] +
+                dx*coeffs['c'][idx]))
+
+class NaturalCubicSpline:
+    """
+    Fitted natural cubic spline that can be evaluated many times.
+    The knots and the coefficients are kept in one contiguous (n, 4) array
+    whose row i holds [a, b, c, d] of the polynomial
+    a + b*(x - x_i) + c*(x - x_i)**2 + d*(x - x_i)**3.
+    With a 2-D y of shape (n_knots, n_series) the coefficients have shape
+    (n, 4, n_series) and evaluations return one column per series.
+    Derivatives and antiderivatives are piecewise polynomials of the same
+    kind, with one column less or one more, and are built only once.
+    Whether the knots are equally spaced is detected once, when the spline
+    is built, so evaluations can compute the interval of each point instead
+    of searching for it (see find_intervals).
+    """
+    __slots__ = ('knots', 'coefficients', 'uniform', '_derivative', '_antiderivative')
+
+    def __init__(self, x, y):
+        coeffs = cubic_spline(x, y)
+        self._set(x, np.stack([coeffs[k] for k in ('a', 'b', 'c', 'd')], axis=1))
+
+    @classmethod
+    def from_coefficients(cls, knots, coefficients):
+        """Build a piecewise polynomial from knots and (n, k) ascending coefficients."""
+        spline = cls.__new__(cls)
+        spline._set(knots, coefficients)
+        return spline
+
+    def _set(self, knots, coefficients):
+        self.knots = np.ascontiguousarray(knots, dtype=float)
+        self.coefficients = np.ascontiguousarray(coefficients, dtype=float)
+        self.uniform = is_uniform(self.knots)
+        self._derivative = None
+        self._antiderivative = None
+
+    def series(self, j):
+        """Spline of the series j of a spline fitted to several series."""
+        return NaturalCubicSpline.from_coefficients(self.knots, self.coefficients[..., j])
+
+    def __call__(self, x, nu=0):
+        """Evaluate the spline (nu=0) or its derivative of order nu at x."""
+        spline = self
+        for _ in range(nu):
+            spline = spline.derivative()
+        idx, dx = find_intervals(x, spline.knots, spline.uniform)
+        columns = np.moveaxis(spline.coefficients, 1, 0)
+        dx = per_point(dx, columns[0])
         
-        # Evaluate the derivative polynomial
-        result[i] = (coeffs['a'][idx] + 
-                    coeffs['b'][idx] * dx +
-                    coeffs['c'][idx] * dx**2)
-    
-    return result
+        # Horner form over the columns, from the highest power down
+        result = columns[-1][idx]
+        for column in columns[-2::-1]:
+            result = column[idx] + dx*result
+        return result
+
+    def derivative(self):
+        """Piecewise polynomial of the derivative (cached)."""
+        if self._derivative is None:
+            k = self.coefficients.shape[1]
+            if k > 1:
+                powers = per_point(np.arange(1, k), self.coefficients[0])
+                coefficients = self.coefficients[:, 1:] * powers
+            else:
+                coefficients = np.zeros_like(self.coefficients)
+            self._derivative = NaturalCubicSpline.from_coefficients(self.knots, coefficients)
+        return self._derivative
+
+    def antiderivative(self):
+        """
+        Piecewise polynomial of the antiderivative that is zero at the first
+        knot and continuous at every knot (cached).
+        """
+        if self._antiderivative is None:
+            powers = np.arange(1, self.coefficients.shape[1] + 1)
+            integrated = self.coefficients / per_point(powers, self.coefficients[0])
+            
+            # Integral over each full interval gives the constant of the next one
+            h = np.diff(self.knots)
+            h_powers = per_point(h[:, None]**powers, self.coefficients[0])
+            interval_integrals = (integrated * h_powers).sum(axis=1)
+            constants = np.zeros_like(interval_integrals)
+            np.cumsum(interval_integrals[:-1], axis=0, out=constants[1:])
+            
+            coefficients = np.concatenate((constants[:, None], integrated), axis=1)
+            self._antiderivative = NaturalCubicSpline.from_coefficients(self.knots, coefficients)
+        return self._antiderivative
+
+    def integrate(self, a, b):
+        """Exact integral of the spline between a and b (one per series)."""
+        antiderivative = self.antiderivative()
+        result = antiderivative(b) - antiderivative(a)
+        return float(result) if np.ndim(result) == 0 else result
@@ -0,0 +1,194 @@
+import numpy as np
+
+def interval_edges(x_min, x_max, n):
+    """Starts and ends of n equal intervals of [x_min, x_max]."""
+    interval_size = (x_max - x_min) / n
+    starts = x_min + np.arange(n) * interval_size
+    return starts, starts + interval_size
+
+class IntervalStatistics:
+    """
+    Sufficient statistics of the linear regressions of y on x in n equal
+    intervals of [x_min, x_max]: count, Σu, Σu², Σy and Σuy per interval,
+    with u = x - center the centered x. A point lying on the edge between
+    two intervals belongs to both, as with the mask
+    (x >= interval_start) & (x <= interval_end).
+    The sums are additive, so new points inside [x_min, x_max] are added
+    with add() touching only their intervals, and regressions() gives every
+    slope and intercept in closed form. y can have several series (columns).
+    """
+
+    __slots__ = ("x_min", "x_max", "n", "counts", "sum_u", "sum_uu", "sum_y", "sum_uy")
+
+    def __init__(self, x_min, x_max, n, n_series=1):
+        self.x_min = float(x_min)
+        self.x_max = float(x_max)
+        self.n = int(n)
+        self.counts = np.zeros(n)
+        self.sum_u = np.zeros(n)
+        self.sum_uu = np.zeros(n)
+        self.sum_y = np.zeros((n, n_series))
+        self.sum_uy = np.zeros((n, n_series))
+
+    @classmethod
+    def from_data(cls, x, ys, n):
+        """Statistics of n intervals spanning the range of x.
+        ys has shape (len(x),) or (len(x), n_series)."""
+        x = np.asarray(x, dtype=float)
+        ys = np.asarray(ys, dtype=float).reshape(len(x), -1)
+        statistics = cls(x.min(), x.max(), n, ys.shape[1])
+        statistics.add(x, ys)
+        return statistics
+
+    @property
+    def center(self):
+        return (self.x_min + self.x_max) / 2
+
+    @property
+    def starts(self):
+        return interval_edges(self.x_min, self.x_max, self.n)[0]
+
+    @property
+    def ends(self):
+        return interval_edges(self.x_min, self.x_max, self.n)[1]
+
+    def covers(self, x):
+        """True if every point of x lies in [x_min, x_max], i.e. adding
+        them does not move the interval edges."""
+        x = np.asarray(x, dtype=float)
+        return bool(np.all((x >= self.x_min) & (x <= self.x_max)))
+
+    def add(self, x, ys):
+        """
+        Add the points (x, ys) to the sums of their intervals.
+        Every point is assigned to its interval(s) with searchsorted and the
+        sums are accumulated with np.bincount. Points outside the intervals
+        are ignored, see covers.
+        """
+        x = np.asarray(x, dtype=float)
+        ys = np.asarray(ys, dtype=float).reshape(len(x), -1)
+        starts, ends, n = self.starts, self.ends, self.n
+
+        # Intervals first..last contain the point: ends[i] >= x and starts[i] <= x
+        first = np.searchsorted(ends, x, side='left')
+        last = np.searchsorted(starts, x, side='right') - 1
+
+        u = x - self.center
+        offset = 0
+        while True:
+            inside = first + offset <= last
+            if not inside.any():
+                break
+            bins = first[inside] + offset
+            u_in = u[inside]
+            self.counts += np.bincount(bins, minlength=n)
+            self.sum_u += np.bincount(bins, u_in, minlength=n)
+            self.sum_uu += np.bincount(bins, u_in * u_in, minlength=n)
+            for j, y_in in enumerate(ys[inside].T):
+                self.sum_y[:, j] += np.bincount(bins, y_in, minlength=n)
+                self.sum_uy[:, j] += np.bincount(bins, u_in * y_in, minlength=n)
+            offset += 1
+
+    def series(self, indices):
+        """Statistics of a subset of the series, given by their indices."""
+        selected = IntervalStatistics(self.x_min, self.x_max, self.n, len(indices))
+        selected.counts, selected.sum_u, selected.sum_uu = self.counts, self.sum_u, self.sum_uu
+        selected.sum_y = self.sum_y[:, indices]
+        selected.sum_uy = self.sum_uy[:, indices]
+        return selected
+
+    def regressions(self):
+        """
+        Least squares line of every interval and series in closed form.
+        Returns interval starts, ends, slopes, intercepts (shape
+        (n, n_series), nan where an interval has fewer than 2 points) and
+        point counts.
+        """
+        counts, sum_u, sum_uu = (values[:, None] for values in (self.counts, self.sum_u, self.sum_uu))
+
+        # Least squares line y = m*(x - center) + b_centered
+        with np.errstate(divide='ignore', invalid='ignore'):
+            slopes = (counts * self.sum_uy - sum_u * self.sum_y) / (counts * sum_uu - sum_u**2)
+            intercepts = (self.sum_y - slopes * sum_u) / counts - slopes * self.center
+        return self.starts, self.ends, slopes, intercepts, self.counts.astype(int)
+
+    def to_arrays(self, prefix=''):
+        """The statistics as a dictionary of arrays, for np.savez."""
+        return {f'{prefix}{name}': np.asarray(getattr(self, name)) for name in self.__slots__}
+
+    @classmethod
+    def from_arrays(cls, arrays, prefix=''):
+        """Inverse of to_arrays."""
+        statistics = cls.__new__(cls)
+        for name in cls.__slots__:
+            setattr(statistics, name, arrays[f'{prefix}{name}'])
+        statistics.x_min, statistics.x_max = float(statistics.x_min), float(statistics.x_max)
+        statistics.n = int(statistics.n)
+        return statistics
+
+class PrefixSums:
+    """
+    Cumulative sums of 1, u, u², v, uv and v² over the points sorted by x,
+    with u and v the centered x and y. The sums over any interval [a, b]
+    are the difference of two rows found with searchsorted, so the
+    regressions of n intervals cost O(n log N) after one O(N log N) sort,
+    whatever n is. Used to score many interval counts in one pass.
+    """
+
+    __slots__ = ("x", "x_min", "x_max", "sums")
+
+    def __init__(self, x, ys):
+        x = np.asarray(x, dtype=float)
+        ys = np.asarray(ys, dtype=float).reshape(len(x), -1)
+        order = np.argsort(x, kind='stable')
+        self.x = x[order]
+        self.x_min, self.x_max = self.x[0], self.x[-1]
+
+        # Center both coordinates to keep the differences of sums accurate
+        u = self.x - (self.x_min + self.x_max) / 2
+        v = ys[order] - ys.mean(axis=0)
+        terms = {
+            'count': np.ones_like(u), 'u': u, 'uu': u * u,
+            'v': v, 'uv': u[:, None] * v, 'vv': v * v,
+        }
+        self.sums = {
+            name: np.concatenate([np.zeros((1,) + term.shape[1:]), np.cumsum(term, axis=0)])
+            for name, term in terms.items()
+        }
+
+    def interval_sums(self, starts, ends):
+        """Sums over the closed intervals [starts[i], ends[i]]."""
+        low = np.searchsorted(self.x, starts, side='left')
+        high = np.searchsorted(self.x, ends, side='right')
+        return {name: sums[high] - sums[low] for name, sums in self.sums.items()}
+
+    def residuals(self, n):
+        """
+        Residual sum of squares of the regression of every interval and
+        series with n intervals (shape (n, n_series)) and the point counts.
+        """
+        sums = self.interval_sums(*interval_edges(self.x_min, self.x_max, n))
+        count = sums['count'][:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            suu = sums['uu'][:, None] - sums['u'][:, None]**2 / count
+            suv = sums['uv'] - sums['u'][:, None] * sums['v'] / count
+            svv = sums['vv'] - sums['v']**2 / count
+            residuals = svv - suv**2 / suu
+        return np.maximum(residuals, 0), sums['count'].astype(int)
+
+    def score(self, n):
+        """
+        Bayesian information criterion of the piecewise linear fit with n
+        intervals, per series (lower is better): m log(RSS/m) + 2n log(m),
+        with m the number of distinct points and 2n parameters.
+        It is inf unless every interval has at least 3 points: with 2 the
+        line passes through both, RSS is 0 and the score has no lower bound,
+        so the largest such n would always win.
+        """
+        residuals, counts = self.residuals(n)
+        if counts.min() < 3:
+            return np.full(residuals.shape[1], np.inf)
+        # Not counts.sum(): a point on the edge of two intervals is in both
+        m = len(self.x)
+        with np.errstate(divide='ignore'):
+            return m * np.log(residuals.sum(axis=0) / m) + 2 * n * np.log(m)
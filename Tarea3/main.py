@@ -1,29 +1,126 @@
 import argparse
+import importlib.util
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
 import numpy as np
 import pandas as pd
+import matplotlib
+matplotlib.use('Agg')  # Figures are only saved to files
 import matplotlib.pyplot as plt
-from cubic_spline_interpolation import cubic_spline, evaluate_spline, cubic_spline_derivative, evaluate_spline_derivative
+from matplotlib.collections import LineCollection
+from cubic_spline_interpolation import NaturalCubicSpline, per_point
+from interval_statistics import IntervalStatistics, PrefixSums
 
-def read_data(filepath):
-    """Read and validate CSV data."""
+def read_header(filepath, raw=False):
+    """Read and validate the header of a CSV file, return its column names.
+    With raw, the names keep the spaces around them, as pandas reads them."""
     # Validate file extension
     if not filepath.lower().endswith('.csv'):
         raise ValueError("File must be a CSV file with .csv extension")
 
+    with open(filepath, 'r') as f:
+        first_lines = [line for _, line in zip(range(2), f)]
+    
+    if not first_lines:
+        raise ValueError("CSV file is empty")
+    if not all(';' in line for line in first_lines):
+        raise ValueError("Invalid CSV format. File must use semicolon (;) as separator")
+    
+    labels = first_lines[0].rstrip('\r\n').split(';')
+    if len(labels) < 2:
+        raise ValueError("File must have at least 2 columns")
+    return labels if raw else [label.strip() for label in labels]
+
+def sidecar_path(filepath):
+    """Binary cache of a CSV file: data.csv -> data.csv.npy"""
+    return filepath + '.npy'
+
+def save_atomic(path, save):
+    """Write path with save(file) through a temporary file, so that readers
+    (and memory maps) of the previous version are never left with a
+    partial file."""
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as f:
+        save(f)
+    os.replace(temporary, path)
+
+def stamp_path(filepath):
+    """Size and modification time of the CSV file the sidecar holds: data.csv -> data.csv.npy.stamp"""
+    return sidecar_path(filepath) + '.stamp'
+
+def source_stamp(filepath):
+    """Size and modification time (ns) of the CSV file, as a string."""
+    status = os.stat(filepath)
+    return f'{status.st_size} {status.st_mtime_ns}'
+
+def sidecar_is_fresh(filepath):
+    """True if the sidecar holds the CSV file as it is now: its stamp
+    matches the current size and modification time of the file."""
     try:
-        with open(filepath, 'r') as f:
-            first_lines = [next(f) for _ in range(2)]
-            
-        if not first_lines:
-            raise ValueError("CSV file is empty")
-            
-        if not all(';' in line for line in first_lines):
-            raise ValueError("Invalid CSV format. File must use semicolon (;) as separator")
+        with open(stamp_path(filepath)) as f:
+            return f.read() == source_stamp(filepath) and os.path.exists(sidecar_path(filepath))
+    except OSError:
+        return False
+
+def write_stamp(filepath, stamp):
+    """Record that the sidecar holds the CSV file with the given stamp."""
+    save_atomic(stamp_path(filepath), lambda f: f.write(stamp.encode()))
 
-        df = pd.read_csv(filepath, sep=';')
-        if len(df.columns) < 2:
-            raise ValueError("File must have at least 2 columns")
-        return df
+def remove_stamp(filepath):
+    """Mark the sidecar as not holding the current CSV file, before it changes."""
+    try:
+        os.remove(stamp_path(filepath))
+    except FileNotFoundError:
+        pass
+
+def read_matrix(filepath, columns=None, engine='c', cache=True):
+    """
+    Read the CSV file as a float64 matrix whose first column is x and the
+    rest are the requested experiments (all of them by default).
+    Only the requested columns are parsed, with an explicit float64 dtype;
+    engine='pyarrow' uses the multithreaded parser of pyarrow if installed.
+    With cache, a full read is saved next to the file as a .npy sidecar in
+    column-major order, and later runs memory-map it instead of parsing the
+    CSV, as long as the CSV keeps the size and modification time recorded
+    in the sidecar's stamp.
+    Returns the column names and the matrix.
+    """
+    try:
+        all_names = read_header(filepath)
+        selected = all_names[1:] if columns is None else list(columns)
+        missing = [column for column in selected if column not in all_names[1:]]
+        if missing:
+            raise ValueError(f"Columns not found: {', '.join(missing)}")
+        names = [all_names[0]] + selected
+        indices = [all_names.index(name) for name in names]
+        full = indices == list(range(len(all_names)))
+        
+        sidecar = sidecar_path(filepath)
+        if cache and sidecar_is_fresh(filepath):
+            matrix = np.load(sidecar, mmap_mode='r')
+            if matrix.shape[1] == len(all_names):
+                return names, matrix if full else matrix[:, indices]
+        
+        check_engine(engine)
+        # Taken before parsing: if the file changes meanwhile, the stamp won't match it
+        stamp = source_stamp(filepath)
+        # Columns by their labels as written, since read_header strips the spaces around names
+        labels = read_header(filepath, raw=True)
+        labels = [labels[i] for i in indices]
+        df = pd.read_csv(filepath, sep=';', usecols=labels, dtype=np.float64, engine=engine)
+        matrix = np.asfortranarray(df[labels].to_numpy(dtype=np.float64))
+        
+        if cache and full:
+            try:
+                remove_stamp(filepath)
+                save_atomic(sidecar, lambda f: np.save(f, matrix))
+                write_stamp(filepath, stamp)
+            except OSError:
+                pass  # The cache is optional, e.g. in a read-only directory
+        return names, matrix
     except FileNotFoundError:
         raise FileNotFoundError(f"File {filepath} not found")
     except pd.errors.EmptyDataError:
@@ -31,97 +128,326 @@ def read_data(filepath):
     except Exception as e:
         raise ValueError(f"Error reading file: {str(e)}")
 
-def perform_linear_regression(x, y):
-    """Calculate linear regression parameters."""
-    A = np.vstack([x, np.ones(len(x))]).T
-    m, b = np.linalg.lstsq(A, y, rcond=None)[0]
-    return m, b
+def statistics_path(filepath):
+    """Interval statistics of the incremental mode: data.csv -> data.csv.stats.npz"""
+    return filepath + '.stats.npz'
 
-def get_interval_midpoint(x_range, m, b):
-    """Calculate midpoint of regression line in interval."""
-    x_mid = np.mean(x_range)
-    y_mid = m * x_mid + b
-    return x_mid, y_mid
+def check_engine(engine):
+    """Raise ValueError if the pandas CSV engine can't be used."""
+    if engine == 'pyarrow' and importlib.util.find_spec('pyarrow') is None:
+        raise ValueError("The pyarrow engine requires the pyarrow package")
 
-def process_intervals(x, y, n):
-    """Process data into n intervals."""
-    x_min, x_max = x.min(), x.max()
-    interval_size = (x_max - x_min) / n
-    midpoints_x = []
-    midpoints_y = []
-    
-    # Count points in each interval
-    points_per_interval = []
-    for i in range(n):
-        interval_start = x_min + i * interval_size
-        interval_end = interval_start + interval_size
-        mask = (x >= interval_start) & (x <= interval_end)
-        points_per_interval.append(np.sum(mask))
+def read_rows(filepath, names, offset=0, engine='c'):
+    """
+    Parse the complete lines of the CSV file from byte offset on as a
+    float64 matrix with columns names (offset 0 skips the header).
+    A last line without newline may still be being written, so it is left
+    for the next read.
+    Returns the matrix and the offset just after the last parsed line.
+    """
+    with open(filepath, 'rb') as f:
+        f.seek(offset)
+        raw = f.read()
+    end = raw.rfind(b'\n') + 1
+    lines = raw[:end]
+    if offset == 0:
+        lines = lines[lines.find(b'\n') + 1:]
+    if not lines.strip():
+        return np.empty((0, len(names)), order='F'), offset + end
+    df = pd.read_csv(io.BytesIO(lines), sep=';', header=None, names=names,
+                     dtype=np.float64, engine=engine)
+    return np.asfortranarray(df.to_numpy(dtype=np.float64)), offset + end
+
+def append_rows(path, rows, new):
+    """
+    Append the rows of new to the row-major float64 .npy file at path after
+    its first `rows` rows, in place: only the new rows and the header are
+    written. Rows beyond `rows`, left by an interrupted update, are
+    overwritten. NumPy pads the header so that the shape can grow without
+    changing its length; if it would change, or the file has another
+    layout, nothing is written.
+    Returns True if the rows were appended.
+    """
+    new = np.ascontiguousarray(new, dtype=np.float64)
+    with open(path, 'r+b') as f:
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            read_array_header, write_array_header = np.lib.format.read_array_header_1_0, np.lib.format.write_array_header_1_0
+        elif version == (2, 0):
+            read_array_header, write_array_header = np.lib.format.read_array_header_2_0, np.lib.format.write_array_header_2_0
+        else:
+            return False
+        shape, fortran_order, dtype = read_array_header(f)
+        data_offset = f.tell()
+        if (fortran_order or dtype != np.float64 or len(shape) != 2
+                or shape[1] != new.shape[1] or shape[0] < rows):
+            return False
+        header = io.BytesIO()
+        write_array_header(header, {'descr': np.lib.format.dtype_to_descr(dtype),
+                                    'fortran_order': False, 'shape': (rows + len(new), shape[1])})
+        if len(header.getvalue()) != data_offset:
+            return False
+        f.seek(data_offset + rows * new.shape[1] * new.itemsize)
+        f.write(new.tobytes())
+        f.truncate()
+        # The header goes last: until then readers see the previous rows only
+        f.flush()
+        f.seek(0)
+        f.write(header.getvalue())
+    return True
+
+def read_fingerprint(filepath, offset, length=256):
+    """The bytes of the file just before offset (the last parsed lines), as
+    a uint8 array, to recognize the file that an offset refers to."""
+    with open(filepath, 'rb') as f:
+        f.seek(max(offset - length, 0))
+        return np.frombuffer(f.read(min(offset, length)), dtype=np.uint8)
+
+def update_incremental(filepath, n_values, engine='c'):
+    """
+    Incremental mode for CSV files that only grow by appended rows.
+    The interval statistics of every n in n_values are persisted in
+    data.csv.stats.npz together with the byte offset and row count already
+    processed, and the matrix in the .npy sidecar, in row-major order. A
+    later call only parses the rows appended after that offset, appends
+    them to the sidecar in place and adds them to the intervals they touch,
+    so its I/O grows with the new rows, not with the file. The statistics
+    are rebuilt from the matrix only if a new x falls outside the previous
+    range, since then every interval edge moves. Everything is rebuilt if
+    the file no longer is the one the state describes: it shrank, or the
+    bytes before the saved offset changed.
+    Returns the column names, the (memory-mapped) matrix and
+    {n: IntervalStatistics}.
+    """
+    check_engine(engine)
+    names = read_header(filepath)
+    n_values = list(n_values)
+    state_file, sidecar = statistics_path(filepath), sidecar_path(filepath)
+    stamp = source_stamp(filepath)
+    
+    rows = statistics = None
+    if os.path.exists(state_file) and os.path.exists(sidecar):
+        with np.load(state_file) as arrays:
+            state = dict(arrays)
+        size = int(stamp.split()[0])
+        if (state['names'].tolist() == names
+                and set(n_values) <= set(state['n_values'].tolist())
+                and 'fingerprint' in state and size >= int(state['size'])
+                and np.array_equal(read_fingerprint(filepath, int(state['offset'])),
+                                   state['fingerprint'])):
+            rows = int(state['rows'])
+            matrix = np.load(sidecar, mmap_mode='r')
+            if matrix.ndim != 2 or matrix.shape[1] != len(names) or len(matrix) < rows:
+                rows = None
+            del matrix  # Released before the sidecar is written
+    
+    if rows is None:
+        # First run, or the previous state doesn't match the file
+        matrix, offset = read_rows(filepath, names, engine=engine)
+        remove_stamp(filepath)
+        save_atomic(sidecar, lambda f: np.save(f, np.ascontiguousarray(matrix)))
+        rows = len(matrix)
+        new = matrix
+    else:
+        new, offset = read_rows(filepath, names, int(state['offset']), engine)
+        statistics = {n: IntervalStatistics.from_arrays(state, f'n{n}_') for n in n_values}
+        if len(new):
+            remove_stamp(filepath)
+            if not append_rows(sidecar, rows, new):
+                matrix = np.concatenate([np.load(sidecar, mmap_mode='r')[:rows], new])
+                save_atomic(sidecar, lambda f: np.save(f, matrix))
+            rows += len(new)
+            if all(statistics[n].covers(new[:, 0]) for n in n_values):
+                for n in n_values:
+                    statistics[n].add(new[:, 0], new[:, 1:])
+            else:
+                statistics = None
+    stored = np.load(sidecar, mmap_mode='r')
+    matrix = stored[:rows]
+    
+    if statistics is None:
+        statistics = {n: IntervalStatistics.from_data(matrix[:, 0], matrix[:, 1:], n)
+                      for n in n_values}
     
+    if len(new):
+        arrays = {'names': np.array(names), 'n_values': np.array(n_values),
+                  'offset': offset, 'rows': rows,
+                  'size': max(int(stamp.split()[0]), offset),
+                  'fingerprint': read_fingerprint(filepath, offset)}
+        for n in n_values:
+            arrays.update(statistics[n].to_arrays(f'n{n}_'))
+        save_atomic(state_file, lambda f: np.savez(f, **arrays))
+    # The sidecar holds the whole file unless a partial last line was left out
+    if offset == int(stamp.split()[0]) and len(stored) == rows and not sidecar_is_fresh(filepath):
+        write_stamp(filepath, stamp)
+    return names, matrix, statistics
+
+def interval_regressions(x, y, n):
+    """
+    Linear regression of y on x in each of n equal intervals, in one pass.
+    A point lying on the edge between two intervals belongs to both, as with
+    the mask (x >= interval_start) & (x <= interval_end).
+    The sums of every interval are accumulated once (see IntervalStatistics)
+    and every slope and intercept follows in closed form.
+    y can be 2-D with shape (len(x), n_series): the binning is shared and
+    slopes and intercepts get shape (n, n_series).
+    Returns interval starts, ends, slopes, intercepts and point counts.
+    """
+    y = np.asarray(y, dtype=float)
+    starts, ends, slopes, intercepts, counts = IntervalStatistics.from_data(x, y, n).regressions()
+    shape = (n,) + y.shape[1:]
+    return starts, ends, slopes.reshape(shape), intercepts.reshape(shape), counts
+
+def interval_midpoints(starts, ends, slopes, intercepts, counts):
+    """Midpoints of the regression lines given by interval_regressions."""
     # Check if any interval has less than 2 points
-    if min(points_per_interval) < 2:
+    if counts.min() < 2:
         raise ValueError("Se necesitan más puntos de muestra para poder llevar a cabo la regresión lineal (mínimo 2 por intervalo)")
     
-    for i in range(n):
-        interval_start = x_min + i * interval_size
-        interval_end = interval_start + interval_size
-        mask = (x >= interval_start) & (x <= interval_end)
-        
-        x_interval = x[mask]
-        y_interval = y[mask]
-        m, b = perform_linear_regression(x_interval, y_interval)
-        x_mid, y_mid = get_interval_midpoint([interval_start, interval_end], m, b)
-        midpoints_x.append(x_mid)
-        midpoints_y.append(y_mid)
+    midpoints_x = (starts + ends) / 2
+    midpoints_y = per_point(midpoints_x, slopes) * slopes + intercepts
+    return midpoints_x, midpoints_y
+
+def process_intervals(x, y, n):
+    """Process data into n intervals.
+    y can be 2-D with one column per experiment, see interval_regressions."""
+    return interval_midpoints(*interval_regressions(x, y, n))
+
+def as_read_only(values):
+    """values as a read-only float array, copied only if it is writeable
+    (a memory-mapped matrix is used in place)."""
+    values = np.asarray(values, dtype=float)
+    if values.flags.writeable:
+        values = values.copy()
+        values.flags.writeable = False
+    return values
+
+def read_only(*arrays):
+    """Mark arrays as read-only so that shared analysis results can't be modified."""
+    for array in arrays:
+        array.flags.writeable = False
+
+@dataclass(frozen=True)
+class IntervalFit:
+    """
+    Analysis of one experiment (column) with n intervals: everything that
+    create_plot and create_grid_visualization draw. Built by analyze and
+    shared through AnalysisCache; the arrays are read-only.
+    """
+    column: str
+    n: int
+    x: np.ndarray
+    y: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    slopes: np.ndarray
+    intercepts: np.ndarray
+    counts: np.ndarray
+    midpoints_x: np.ndarray
+    midpoints_y: np.ndarray
+    spline: NaturalCubicSpline
+    x_smooth: np.ndarray
+    y_smooth: np.ndarray
+    y_deriv: np.ndarray
     
-    return np.array(midpoints_x), np.array(midpoints_y)
+    def regression_lines(self):
+        """Yield the index and end points (x_reg, y_reg) of every regression
+        line, skipping intervals with fewer than 2 points."""
+        for i in np.flatnonzero(self.counts > 1):
+            x_reg = np.array([self.starts[i], self.ends[i]])
+            yield i, x_reg, self.slopes[i] * x_reg + self.intercepts[i]
+    
+    def regression_segments(self):
+        """All regression lines as one (k, 2, 2) array of segments
+        [(start, y_start), (end, y_end)], as used by LineCollection."""
+        valid = self.counts > 1
+        x_reg = np.column_stack([self.starts[valid], self.ends[valid]])
+        y_reg = self.slopes[valid, None] * x_reg + self.intercepts[valid, None]
+        return np.stack([x_reg, y_reg], axis=-1)
 
-def create_plot(x, y, n, column_name):
-    """Create and save individual plot."""
-    fig = plt.figure(figsize=(10, 6))
-    ax1 = fig.add_subplot(111)
-    ax2 = ax1.twinx()
+def analyze(x, ys, columns, n, statistics=None):
+    """
+    Analyse every experiment with n intervals at once: interval regressions,
+    midpoints, spline, smoothed curve and derivative.
+    ys has one column per experiment, named by columns.
+    statistics: IntervalStatistics of x and ys with n intervals, if already
+    known (incremental mode); the regressions then come from its sums.
+    Returns a list with one IntervalFit per column.
+    """
+    x = np.asarray(x, dtype=float)
+    ys = np.asarray(ys, dtype=float)
+    if statistics is None:
+        regressions = interval_regressions(x, ys, n)
+    else:
+        regressions = statistics.regressions()
+    starts, ends, slopes, intercepts, counts = regressions
+    midpoints_x, midpoints_y = interval_midpoints(*regressions)
+    splines = NaturalCubicSpline(midpoints_x, midpoints_y)
+    x_smooth = np.linspace(x.min(), x.max(), 200)
+    y_smooth = splines(x_smooth)
+    y_deriv = splines(x_smooth, nu=1)
+    read_only(starts, ends, slopes, intercepts, counts,
+              midpoints_x, midpoints_y, x_smooth, y_smooth, y_deriv)
     
-    # Process intervals
-    x_min, x_max = x.min(), x.max()
-    interval_size = (x_max - x_min) / n
+    return [
+        IntervalFit(column, n, x, ys[:, j], starts, ends, slopes[:, j],
+                    intercepts[:, j], counts, midpoints_x, midpoints_y[:, j],
+                    splines.series(j), x_smooth, y_smooth[:, j], y_deriv[:, j])
+        for j, column in enumerate(columns)
+    ]
+
+class AnalysisCache:
+    """
+    Memoized analysis results keyed by (column, n).
+    The first request for some n analyses every column with that n at once
+    (see analyze); later requests for any column with the same n are lookups.
+    """
     
-    # Plot regression lines for each interval - updated plotting
-    for i in range(n):
-        interval_start = x_min + i * interval_size
-        interval_end = interval_start + interval_size
-        mask = (x >= interval_start) & (x <= interval_end)
-        
-        if np.sum(mask) > 1:
-            x_interval = x[mask]
-            y_interval = y[mask]
-            m, b = perform_linear_regression(x_interval, y_interval)
-            x_reg = np.array([interval_start, interval_end])
-            y_reg = m * x_reg + b
-            if i == 0:  # Only add label once for legend
-                ax1.plot(x_reg, y_reg, 'b-', alpha=0.7, label='Líneas de Regresión')
-            else:
-                ax1.plot(x_reg, y_reg, 'b-', alpha=0.7)
+    def __init__(self, x, ys, columns, statistics=None):
+        # Read-only data shared by every IntervalFit
+        self.x = as_read_only(x)
+        self.ys = as_read_only(ys)
+        self.columns = list(columns)
+        # {n: IntervalStatistics} already computed, see update_incremental
+        self.statistics = statistics or {}
+        self._fits = {}
     
-    # Process data and calculate midpoints
-    midpoints_x, midpoints_y = process_intervals(x, y, n)
+    @classmethod
+    def from_matrix(cls, names, matrix, statistics=None):
+        """Cache over the experiments of a matrix given by read_matrix,
+        whose first column is x."""
+        return cls(matrix[:, 0], matrix[:, 1:], names[1:], statistics)
     
-    # Calculate spline interpolation
-    coeffs = cubic_spline(midpoints_x, midpoints_y)
-    x_smooth = np.linspace(x.min(), x.max(), 200)
-    y_smooth = evaluate_spline(x_smooth, midpoints_x, coeffs)
+    def get(self, column, n):
+        """Return the IntervalFit of column with n intervals."""
+        if (column, n) not in self._fits:
+            for fit in analyze(self.x, self.ys, self.columns, n, self.statistics.get(n)):
+                self._fits[fit.column, n] = fit
+        return self._fits[column, n]
     
-    # Calculate derivative
-    deriv_coeffs = cubic_spline_derivative(coeffs)
-    y_deriv = evaluate_spline_derivative(x_smooth, midpoints_x, deriv_coeffs)
+    def __len__(self):
+        return len(self._fits)
+
+def create_plot(fit, dpi=None):
+    """Create and save the individual plot of an IntervalFit."""
+    fig = plt.figure(figsize=(10, 6))
+    ax1 = fig.add_subplot(111)
+    ax2 = ax1.twinx()
+    
+    # Plot regression lines for each interval - updated plotting
+    for i, x_reg, y_reg in fit.regression_lines():
+        if i == 0:  # Only add label once for legend
+            ax1.plot(x_reg, y_reg, 'b-', alpha=0.7, label='Líneas de Regresión')
+        else:
+            ax1.plot(x_reg, y_reg, 'b-', alpha=0.7)
     
     # Plot original data
-    ax1.scatter(x, y, alpha=0.5, label='Datos Originales')
-    ax1.scatter(midpoints_x, midpoints_y, color='red', label='Puntos Medios')
-    ax1.plot(x_smooth, y_smooth, 'g-', label='Interpolación Spline')
+    ax1.scatter(fit.x, fit.y, alpha=0.5, label='Datos Originales')
+    ax1.scatter(fit.midpoints_x, fit.midpoints_y, color='red', label='Puntos Medios')
+    ax1.plot(fit.x_smooth, fit.y_smooth, 'g-', label='Interpolación Spline')
     
     # Plot derivative on secondary axis
-    ax2.plot(x_smooth, y_deriv, 'r--', label='Derivada')
+    ax2.plot(fit.x_smooth, fit.y_deriv, 'r--', label='Derivada')
     
     # Configure plot
     ax1.set_xlabel('x')
@@ -142,57 +468,39 @@ def create_plot(x, y, n, column_name):
               frameon=True)
     
     # Save plot with adjusted margin
-    plt.savefig(f'{column_name}_{n}.png', 
+    plt.savefig(f'{fit.column}_{fit.n}.png', 
                 bbox_inches='tight',
-                pad_inches=0.2)
+                pad_inches=0.2,
+                dpi=dpi)
     plt.close()
     
     return fig
 
-def create_grid_visualization(df, n_range=(6, 11)):
-    """Create grid of visualizations."""
-    columns = df.columns[1:]  # Skip x column
-    n_values = range(*n_range)
+def create_grid_visualization(cache, n_values=range(6, 11), dpi=None):
+    """Create grid of visualizations from the fits of an AnalysisCache,
+    one row per n in n_values."""
+    columns = cache.columns
     
-    fig, axes = plt.subplots(len(n_values), len(columns), 
+    fig, axes = plt.subplots(len(n_values), len(columns), squeeze=False,
                             figsize=(5*len(columns), 4*len(n_values)))
     
     for i, n in enumerate(n_values):
         for j, col in enumerate(columns):
-            ax1 = axes[i, j] if len(n_values) > 1 else axes[j]
+            fit = cache.get(col, n)
+            ax1 = axes[i, j]
             ax2 = ax1.twinx()  # Create secondary axis for derivative
-            x, y = df.iloc[:, 0], df[col]
             
             # Plot regression lines
-            x_min, x_max = x.min(), x.max()
-            interval_size = (x_max - x_min) / n
-            for k in range(n):
-                interval_start = x_min + k * interval_size
-                interval_end = interval_start + interval_size
-                mask = (x >= interval_start) & (x <= interval_end)
-                if np.sum(mask) > 1:
-                    x_interval = x[mask]
-                    y_interval = y[mask]
-                    m, b = perform_linear_regression(x_interval, y_interval)
-                    x_reg = np.array([interval_start, interval_end])
-                    y_reg = m * x_reg + b
-                    ax1.plot(x_reg, y_reg, 'b-', alpha=0.7)
-            
-            # Process data and calculate all curves
-            midpoints_x, midpoints_y = process_intervals(x, y, n)
-            coeffs = cubic_spline(midpoints_x, midpoints_y)
-            x_smooth = np.linspace(x.min(), x.max(), 200)
-            y_smooth = evaluate_spline(x_smooth, midpoints_x, coeffs)
+            for _, x_reg, y_reg in fit.regression_lines():
+                ax1.plot(x_reg, y_reg, 'b-', alpha=0.7)
             
-            # Calculate and plot derivative
-            deriv_coeffs = cubic_spline_derivative(coeffs)
-            y_deriv = evaluate_spline_derivative(x_smooth, midpoints_x, deriv_coeffs)
-            ax2.plot(x_smooth, y_deriv, 'r--', alpha=0.5)
+            # Plot derivative
+            ax2.plot(fit.x_smooth, fit.y_deriv, 'r--', alpha=0.5)
             
             # Plot all elements
-            ax1.scatter(x, y, alpha=0.5, s=5, color='gray')  # Increased size and opacity
-            ax1.scatter(midpoints_x, midpoints_y, color='red', s=20)
-            ax1.plot(x_smooth, y_smooth, 'g-')
+            ax1.scatter(fit.x, fit.y, alpha=0.5, s=5, color='gray')  # Increased size and opacity
+            ax1.scatter(fit.midpoints_x, fit.midpoints_y, color='red', s=20)
+            ax1.plot(fit.x_smooth, fit.y_smooth, 'g-')
             
             # Configure axes
             if i == 0:
@@ -209,33 +517,233 @@ def create_grid_visualization(df, n_range=(6, 11)):
                 ax2.set_yticks([])
     
     plt.tight_layout()
-    plt.savefig('grid_visualization.png')
+    plt.savefig('grid_visualization.png', dpi=dpi)
     plt.close()
 
+def set_limits(ax, x, ys, margin=0.05):
+    """Set the view limits of ax to the range of x and of the arrays ys.
+    Needed in bulk mode, where autoscaling ignores collections."""
+    y = np.concatenate([np.ravel(values) for values in ys])
+    for values, set_lim in ((x, ax.set_xlim), (y, ax.set_ylim)):
+        low, high = np.nanmin(values), np.nanmax(values)
+        pad = margin * (high - low) or 0.5
+        set_lim(low - pad, high + pad)
+
+class BulkCanvas:
+    """
+    Single figure reused for every individual plot of a bulk run.
+    The artists are created once and every plot only replaces their data
+    (set_segments, set_offsets, set_data) before saving. There is no twin
+    axis and no legend: the derivative is drawn in a second panel below
+    and all regression lines are one LineCollection.
+    """
+    
+    def __init__(self):
+        self.fig, (self.ax, self.ax_deriv) = plt.subplots(
+            2, 1, sharex=True, figsize=(10, 6), height_ratios=(3, 1))
+        self.segments = LineCollection([], colors='b', alpha=0.7)
+        self.ax.add_collection(self.segments)
+        self.data = self.ax.scatter([], [], alpha=0.5)
+        self.midpoints = self.ax.scatter([], [], color='red')
+        self.curve, = self.ax.plot([], [], 'g-')
+        self.deriv, = self.ax_deriv.plot([], [], 'r--')
+        self.ax.set_ylabel('y')
+        self.ax_deriv.set_xlabel('x')
+        self.ax_deriv.set_ylabel('dy/dx')
+    
+    def draw(self, fit, dpi=None):
+        """Draw fit and save it as {column}_{n}.png."""
+        segments = fit.regression_segments()
+        self.segments.set_segments(segments)
+        self.data.set_offsets(np.column_stack([fit.x, fit.y]))
+        self.midpoints.set_offsets(np.column_stack([fit.midpoints_x, fit.midpoints_y]))
+        self.curve.set_data(fit.x_smooth, fit.y_smooth)
+        self.deriv.set_data(fit.x_smooth, fit.y_deriv)
+        self.ax.set_title(f'{fit.column}, n={fit.n}')
+        set_limits(self.ax, fit.x, (fit.y, fit.y_smooth, segments[..., 1]))
+        set_limits(self.ax_deriv, fit.x, (fit.y_deriv,))
+        self.fig.savefig(f'{fit.column}_{fit.n}.png', dpi=dpi)
+
+@lru_cache(maxsize=None)
+def bulk_canvas():
+    """The BulkCanvas of this process, created on first use."""
+    return BulkCanvas()
+
+def create_bulk_grid(cache, n_values=range(6, 11), dpi=None):
+    """
+    Bulk version of create_grid_visualization: one axis per subplot, the
+    regression lines of each subplot as one LineCollection, no derivative
+    axes and no tight_layout pass.
+    """
+    columns = cache.columns
+    
+    fig, axes = plt.subplots(len(n_values), len(columns), squeeze=False,
+                            figsize=(5*len(columns), 4*len(n_values)))
+    
+    for i, n in enumerate(n_values):
+        for j, col in enumerate(columns):
+            fit = cache.get(col, n)
+            ax = axes[i, j]
+            segments = fit.regression_segments()
+            ax.add_collection(LineCollection(segments, colors='b', alpha=0.7))
+            ax.scatter(fit.x, fit.y, alpha=0.5, s=5, color='gray')
+            ax.scatter(fit.midpoints_x, fit.midpoints_y, color='red', s=20)
+            ax.plot(fit.x_smooth, fit.y_smooth, 'g-')
+            set_limits(ax, fit.x, (fit.y, fit.y_smooth, segments[..., 1]))
+            if i == 0:
+                ax.set_title(col)
+            if j == 0:
+                ax.set_ylabel(f'n={n}')
+    
+    fig.savefig('grid_visualization.png', dpi=dpi)
+    plt.close(fig)
+
+def render_plot(fit, bulk=False, dpi=None):
+    """Render the individual plot of fit and return its file name."""
+    if bulk:
+        bulk_canvas().draw(fit, dpi)
+    else:
+        create_plot(fit, dpi)
+    return f'{fit.column}_{fit.n}.png'
+
+def render_grid(cache, n_values, bulk=False, dpi=None):
+    """Render the grid visualization and return its file name."""
+    if bulk:
+        create_bulk_grid(cache, n_values, dpi)
+    else:
+        create_grid_visualization(cache, n_values, dpi)
+    return 'grid_visualization.png'
+
+def render(cache, n_values=range(6, 11), jobs=1, bulk=False, dpi=None, selection=None):
+    """
+    Render the individual plots of every column and n in n_values and the
+    grid visualization. The analyses are computed up front, so with jobs > 1
+    the worker processes only receive the numeric arrays of each IntervalFit
+    and draw with the Agg backend; the grid renders in one of the workers
+    alongside the individual plots.
+    bulk selects the low-overhead plots of BulkCanvas and create_bulk_grid
+    and dpi the resolution of the PNG files (default: Matplotlib's).
+    selection: {column: n} chosen by select_n; only those plots are drawn
+    and the grid only has rows for the selected n values.
+    Returns the file names of the figures.
+    """
+    if selection is None:
+        fits = [cache.get(column, n) for n in n_values for column in cache.columns]
+    else:
+        fits = [cache.get(column, selection[column]) for column in cache.columns]
+        n_values = sorted(set(selection.values()))
+    plot = partial(render_plot, bulk=bulk, dpi=dpi)
+    if jobs == 1:
+        files = [plot(fit) for fit in fits]
+        files.append(render_grid(cache, n_values, bulk, dpi))
+        return files
+    
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # The grid is the slowest figure, so it starts first
+        grid = executor.submit(render_grid, cache, n_values, bulk, dpi)
+        chunksize = max(1, len(fits) // (jobs * 4))
+        files = list(executor.map(plot, fits, chunksize=chunksize))
+        files.append(grid.result())
+    return files
+
+def select_n(x, ys, n_values):
+    """
+    Score every number of intervals in n_values for every experiment with
+    the BIC of its interval regressions (see PrefixSums.score): the data
+    is sorted once and each n then costs O(n log N). Only the n whose
+    intervals all hold at least 3 points can be chosen.
+    Returns the scores, shape (len(n_values), n_series), and the best n of
+    every experiment.
+    """
+    prefix_sums = PrefixSums(x, ys)
+    scores = np.array([prefix_sums.score(n) for n in n_values])
+    if np.isinf(scores).all(axis=0).any():
+        raise ValueError("Se necesitan más puntos de muestra para comparar los valores de n (mínimo 3 por intervalo)")
+    best = np.asarray(n_values)[np.argmin(scores, axis=0)]
+    return scores, best
+
+def parse_n_range(text):
+    """Parse the --n-range argument 'a:b' as range(a, b + 1)."""
+    try:
+        low, high = (int(value) for value in text.split(':'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid n range '{text}', expected a:b")
+    if not 1 <= low <= high:
+        raise argparse.ArgumentTypeError(f"invalid n range '{text}', expected 1 <= a <= b")
+    return range(low, high + 1)
+
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description="main")
     parser.add_argument(
         "-i", "--input", type=str, required=True, help="CSV file")
+    parser.add_argument(
+        "-c", "--columns", type=str, default=None,
+        help="Comma separated experiments to process (default: all)")
+    parser.add_argument(
+        "--engine", choices=("c", "pyarrow"), default="c",
+        help="CSV parser of pandas (default: c)")
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Neither read nor write the .npy sidecar of the CSV file")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Only process the rows appended since the last incremental run")
+    parser.add_argument(
+        "--n-range", type=parse_n_range, default=None,
+        help="Sweep the number of intervals n from a to b (a:b) and only "
+             "render the best n of every experiment")
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=1,
+        help="Number of processes that render the figures (default: 1)")
+    parser.add_argument(
+        "--bulk", action="store_true",
+        help="Low-overhead plots for wide inputs: one reused figure, no twin axes or legends")
+    parser.add_argument(
+        "--dpi", type=float, default=None,
+        help="Resolution of the PNG files (default: Matplotlib's)")
     args = parser.parse_args()
+    if args.incremental and args.no_cache:
+        parser.error("--incremental keeps the data in the .npy sidecar, it can't be used with --no-cache")
     try:
         # Read data
-        data_str = args.input
-        df = read_data(data_str)
-        x = df.iloc[:, 0].values
+        columns = args.columns.split(',') if args.columns else None
+        n_values = args.n_range or range(6, 11)
+        statistics = None
+        if args.incremental:
+            names, data, statistics = update_incremental(args.input, n_values, engine=args.engine)
+            if columns is not None:
+                missing = [column for column in columns if column not in names[1:]]
+                if missing:
+                    raise ValueError(f"Columns not found: {', '.join(missing)}")
+                indices = [names.index(column) for column in columns]
+                names, data = [names[0]] + columns, data[:, [0] + indices]
+                statistics = {n: stats.series([i - 1 for i in indices])
+                              for n, stats in statistics.items()}
+        else:
+            names, data = read_matrix(args.input, columns, engine=args.engine,
+                                      cache=not args.no_cache)
         
         # Validate minimum number of rows
-        if len(df) < 10:
+        if len(data) < 10:
             raise ValueError("Se necesitan más puntos de muestra para poder llevar a cabo la regresión lineal (mínimo 2 puntos por intervalo)")
         
-        # Process each experiment for n values 6 to 10
-        for column in df.columns[1:]:  # Skip x column
-            y = df[column].values
-            for n in range(6, 11):
-                create_plot(x, y, n, column)
+        if args.jobs < 1:
+            raise ValueError("El número de procesos (--jobs) debe ser al menos 1")
+        if args.dpi is not None and args.dpi <= 0:
+            raise ValueError("La resolución (--dpi) debe ser positiva")
         
-        # Create grid visualization
-        create_grid_visualization(df, n_range=(6, 11))
+        # Analyse each experiment once per n; the individual plots and the
+        # grid visualization draw from the same cache
+        cache = AnalysisCache.from_matrix(names, data, statistics)
+        selection = None
+        if args.n_range:
+            scores, best = select_n(cache.x, cache.ys, n_values)
+            selection = dict(zip(cache.columns, best.tolist()))
+            for column, n in selection.items():
+                print(f"{column}: n={n}")
+        render(cache, n_values, jobs=args.jobs, bulk=args.bulk, dpi=args.dpi,
+               selection=selection)
         
     except Exception as e:
         print(f"Error: {str(e)}")
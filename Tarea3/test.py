@@ -1,8 +1,17 @@
+import argparse
+import importlib.util
+import os
 import numpy as np
 from scipy.interpolate import CubicSpline
-from cubic_spline_interpolation import cubic_spline, evaluate_spline, cubic_spline_derivative, evaluate_spline_derivative
+from cubic_spline_interpolation import cubic_spline, evaluate_spline, cubic_spline_derivative, evaluate_spline_derivative, evaluate_spline_derivatives, NaturalCubicSpline, find_intervals, is_uniform
+from interval_statistics import IntervalStatistics, PrefixSums
+from main import AnalysisCache, interval_regressions, parse_n_range, process_intervals, read_matrix, render, select_n, sidecar_path, update_incremental, append_rows
 import pytest
 
+# pyarrow is optional (--engine pyarrow)
+requires_pyarrow = pytest.mark.skipif(importlib.util.find_spec('pyarrow') is None,
+                                      reason="pyarrow is not installed")
+
 def test_simple_polynomial():
     x = np.array([0, 0.5, 1])
     y = x**3
@@ -73,5 +82,369 @@ def test_derivative_sinusoidal():
     
     np.testing.assert_allclose(our_derivative, scipy_derivative, rtol=1e-7)
 
+def test_derivatives_one_pass():
+    # Value, first and second derivative, including points outside the knots
+    x = np.linspace(0, 2*np.pi, 10)
+    y = np.sin(x)
+    
+    coeffs = cubic_spline(x, y)
+    x_eval = np.linspace(-0.5, 2*np.pi + 0.5, 300)
+    values, first, second = evaluate_spline_derivatives(x_eval, x, coeffs)
+    
+    cs = CubicSpline(x, y, bc_type='natural', extrapolate=True)
+    np.testing.assert_allclose(values, cs(x_eval), rtol=1e-7, atol=1e-12)
+    np.testing.assert_allclose(first, cs(x_eval, 1), rtol=1e-7, atol=1e-12)
+    np.testing.assert_allclose(second, cs(x_eval, 2), rtol=1e-7, atol=1e-12)
+    np.testing.assert_allclose(values, evaluate_spline(x_eval, x, coeffs))
+
+def test_non_uniform_knots():
+    # Many non-uniform knots, solved through the banded system
+    rng = np.random.default_rng(0)
+    x = np.sort(rng.uniform(0, 10, 1000))
+    y = np.cos(x)
+    
+    coeffs = cubic_spline(x, y)
+    x_eval = np.linspace(x[0], x[-1], 5000)
+    our_result = evaluate_spline(x_eval, x, coeffs)
+    
+    cs = CubicSpline(x, y, bc_type='natural')
+    scipy_result = cs(x_eval)
+    
+    np.testing.assert_allclose(our_result, scipy_result, rtol=1e-7, atol=1e-12)
+
+def test_two_knots():
+    # With two knots the natural spline is the straight line between them
+    x = np.array([0.0, 2.0])
+    y = np.array([1.0, 5.0])
+    
+    coeffs = cubic_spline(x, y)
+    
+    np.testing.assert_allclose(coeffs['b'], [2.0])
+    np.testing.assert_allclose(coeffs['c'], [0.0])
+    np.testing.assert_allclose(coeffs['d'], [0.0])
+
+def test_spline_object():
+    x = np.linspace(0, 2*np.pi, 10)
+    y = np.sin(x)
+    
+    spline = NaturalCubicSpline(x, y)
+    x_eval = np.linspace(0, 2*np.pi, 100)
+    cs = CubicSpline(x, y, bc_type='natural')
+    
+    assert spline.coefficients.shape == (9, 4)
+    for nu in range(3):
+        np.testing.assert_allclose(spline(x_eval, nu), cs(x_eval, nu), rtol=1e-7, atol=1e-12)
+    # Derivative objects are built once
+    assert spline.derivative() is spline.derivative()
+
+def test_spline_integrate():
+    x = np.linspace(0, 2*np.pi, 10)
+    y = np.sin(x)
+    
+    spline = NaturalCubicSpline(x, y)
+    cs = CubicSpline(x, y, bc_type='natural')
+    
+    np.testing.assert_allclose(spline.integrate(0, 2*np.pi), cs.integrate(0, 2*np.pi), atol=1e-12)
+    np.testing.assert_allclose(spline.integrate(0.3, 4.1), cs.integrate(0.3, 4.1), rtol=1e-10)
+    # The derivative of the antiderivative is the spline itself
+    x_eval = np.linspace(0, 6, 50)
+    np.testing.assert_allclose(spline.antiderivative()(x_eval, 1), spline(x_eval), atol=1e-12)
+
+def test_multiple_series():
+    # Every column of y is an independent series over the same knots
+    x = np.linspace(0, 2*np.pi, 10)
+    y = np.column_stack([np.sin(x), np.cos(x), x**2])
+    
+    coeffs = cubic_spline(x, y)
+    x_eval = np.linspace(0, 2*np.pi, 100)
+    our_result = evaluate_spline(x_eval, x, coeffs)
+    
+    assert our_result.shape == (100, 3)
+    for j in range(3):
+        single = evaluate_spline(x_eval, x, cubic_spline(x, y[:, j]))
+        np.testing.assert_allclose(our_result[:, j], single, rtol=1e-12, atol=1e-15)
+    
+    spline = NaturalCubicSpline(x, y)
+    cs = CubicSpline(x, y, bc_type='natural')
+    np.testing.assert_allclose(spline(x_eval, 1), cs(x_eval, 1), rtol=1e-7, atol=1e-12)
+    np.testing.assert_allclose(spline.integrate(0, 2), cs.integrate(0, 2), rtol=1e-10)
+    np.testing.assert_allclose(spline.series(2)(x_eval), our_result[:, 2])
+
+def test_find_intervals():
+    # Midpoints of equal intervals, as main.py builds the knots
+    starts = 1.5 + np.arange(7) * (8.5 / 7)
+    x = starts + 8.5 / 14
+    assert is_uniform(x)
+    assert not is_uniform(np.array([0.0, 1.0, 3.0]))
+    
+    rng = np.random.default_rng(0)
+    # Random order, on the knots, one ulp around them and outside the knots
+    x_eval = np.concatenate([rng.uniform(0, 12, 1000), x, np.nextafter(x, 0), np.nextafter(x, 20)])
+    rng.shuffle(x_eval)
+    for values in (x_eval, np.sort(x_eval)):
+        expected = np.clip(np.searchsorted(x, values) - 1, 0, len(x) - 2)
+        for uniform in (None, True, False):
+            idx, dx = find_intervals(values, x, uniform)
+            np.testing.assert_array_equal(idx, expected)
+            np.testing.assert_array_equal(dx, values - x[expected])
+    
+    spline = NaturalCubicSpline(x, np.sin(x))
+    assert spline.uniform and spline.derivative().uniform
+    assert spline(x[3]) == pytest.approx(np.sin(x[3]))
+
+def test_find_intervals_long_grid():
+    # Every spacing is within 1e-6 of h, but the knots drift two intervals
+    # away from x0 + k*h halfway along the grid
+    n = 1000000
+    h = np.where(np.arange(n) < n // 2, 1 + 4e-6, 1 - 4e-6)
+    x = np.concatenate([[0.0], np.cumsum(h)])
+    assert not is_uniform(x)
+    
+    # Small noise on each knot keeps the grid uniform
+    rng = np.random.default_rng(0)
+    noisy = np.arange(n + 1) + rng.uniform(-0.1, 0.1, n + 1)
+    assert is_uniform(noisy)
+    
+    x_eval = rng.uniform(-1, n + 1, 200000)
+    for knots in (x, noisy):
+        expected = np.clip(np.searchsorted(knots, x_eval) - 1, 0, n - 1)
+        idx, dx = find_intervals(x_eval, knots)
+        np.testing.assert_array_equal(idx, expected)
+        np.testing.assert_array_equal(dx, x_eval - knots[expected])
+
+def test_interval_regressions():
+    # Points on the interval edges belong to both neighbouring intervals
+    x = np.linspace(0, 6, 25)
+    y = np.sin(x) + x**2
+    starts, ends, slopes, intercepts, counts = interval_regressions(x, y, 6)
+    
+    for i in range(6):
+        mask = (x >= starts[i]) & (x <= ends[i])
+        assert counts[i] == mask.sum()
+        m, b = np.polyfit(x[mask], y[mask], 1)
+        np.testing.assert_allclose([slopes[i], intercepts[i]], [m, b], rtol=1e-9, atol=1e-9)
+    
+    midpoints_x, midpoints_y = process_intervals(x, y, 6)
+    np.testing.assert_allclose(midpoints_x, np.arange(6) + 0.5)
+    np.testing.assert_allclose(midpoints_y, slopes * midpoints_x + intercepts)
+    
+    # Fewer than 2 points in an interval
+    with pytest.raises(ValueError):
+        process_intervals(np.arange(10.0), np.arange(10.0), 8)
+
+def test_analysis_cache():
+    x = np.linspace(0, 10, 60)
+    ys = np.column_stack([np.sin(x), x**2, np.exp(-x)])
+    cache = AnalysisCache(x, ys, ['a', 'b', 'c'])
+    
+    fit = cache.get('b', 7)
+    assert len(cache) == 3  # Every column is analysed with n=7 at once
+    assert cache.get('b', 7) is fit
+    assert len(cache) == 3
+    
+    midpoints_x, midpoints_y = process_intervals(x, ys[:, 1], 7)
+    np.testing.assert_allclose(fit.midpoints_x, midpoints_x)
+    np.testing.assert_allclose(fit.midpoints_y, midpoints_y)
+    np.testing.assert_allclose(fit.spline(fit.x_smooth), fit.y_smooth)
+    np.testing.assert_allclose(fit.spline(fit.x_smooth, nu=1), fit.y_deriv)
+    assert len(list(fit.regression_lines())) == 7
+    segments = fit.regression_segments()
+    assert segments.shape == (7, 2, 2)
+    for (i, x_reg, y_reg), segment in zip(fit.regression_lines(), segments):
+        np.testing.assert_allclose(segment, np.column_stack([x_reg, y_reg]))
+    
+    # The results are immutable
+    with pytest.raises(AttributeError):
+        fit.n = 8
+    with pytest.raises(ValueError):
+        fit.midpoints_y[0] = 0
+
+@pytest.mark.parametrize('jobs, bulk', [(1, False), (2, False), (1, True), (2, True)])
+def test_render(tmp_path, monkeypatch, jobs, bulk):
+    monkeypatch.chdir(tmp_path)
+    x = np.linspace(0, 10, 40)
+    cache = AnalysisCache(x, np.column_stack([np.sin(x), np.cos(x)]), ['a', 'b'])
+    
+    files = render(cache, range(6, 8), jobs=jobs, bulk=bulk, dpi=50)
+    assert files == ['a_6.png', 'b_6.png', 'a_7.png', 'b_7.png', 'grid_visualization.png']
+    assert all((tmp_path / name).exists() for name in files)
+
+def test_read_matrix(tmp_path):
+    path = str(tmp_path / 'data.csv')
+    x = np.linspace(0, 1, 20)
+    np.savetxt(path, np.column_stack([x, x**2, np.sin(x)]), delimiter=';',
+               header='x;b;a', comments='')
+    
+    names, matrix = read_matrix(path)
+    assert names == ['x', 'b', 'a']
+    assert matrix.dtype == np.float64 and matrix.flags.f_contiguous
+    np.testing.assert_allclose(matrix[:, 2], np.sin(x))
+    
+    # The second read memory-maps the .npy sidecar
+    names, cached = read_matrix(path)
+    assert isinstance(cached, np.memmap)
+    np.testing.assert_array_equal(cached, matrix)
+    
+    # Only the requested columns, in the requested order
+    names, subset = read_matrix(path, ['a', 'b'], cache=False)
+    assert names == ['x', 'a', 'b']
+    np.testing.assert_array_equal(subset, matrix[:, [0, 2, 1]])
+    
+    # A CSV that changed size is parsed again, even with its old modification time
+    status = os.stat(path)
+    with open(path, 'a') as f:
+        f.write('2;4;0.5\n')
+    os.utime(path, ns=(status.st_atime_ns, status.st_mtime_ns))
+    names, matrix = read_matrix(path)
+    assert len(matrix) == 21 and not isinstance(matrix, np.memmap)
+    assert isinstance(read_matrix(path)[1], np.memmap)
+    
+    with pytest.raises(ValueError):
+        read_matrix(path, ['c'])
+
+@pytest.mark.parametrize('engine', ['c', pytest.param('pyarrow', marks=requires_pyarrow)])
+def test_read_matrix_header_spaces(tmp_path, engine):
+    # Names in the header may be surrounded by spaces
+    path = str(tmp_path / 'data.csv')
+    x = np.linspace(0, 1, 20)
+    with open(path, 'w') as f:
+        f.write('x; Linear ; Quadratic\n')
+        for value in x:
+            f.write(f'{value}; {2 * value}; {value**2}\n')
+    names, subset = read_matrix(path, ['Quadratic', 'Linear'], engine=engine, cache=False)
+    assert names == ['x', 'Quadratic', 'Linear']
+    np.testing.assert_allclose(subset, np.column_stack([x, x**2, 2 * x]))
+
+def test_interval_statistics():
+    x = np.linspace(0, 6, 61)
+    ys = np.column_stack([np.sin(x), np.exp(x / 3)])
+    
+    # Adding the points in chunks gives the same sums as one pass
+    statistics = IntervalStatistics(x.min(), x.max(), 6, 2)
+    order = np.random.default_rng(0).permutation(len(x))
+    for chunk in np.array_split(order, 4):
+        assert statistics.covers(x[chunk])
+        statistics.add(x[chunk], ys[chunk])
+    for expected, result in zip(interval_regressions(x, ys, 6), statistics.regressions()):
+        np.testing.assert_allclose(result, expected, rtol=1e-10, atol=1e-12)
+    assert not statistics.covers([7.0])
+    
+    restored = IntervalStatistics.from_arrays(statistics.to_arrays('n6_'), 'n6_')
+    np.testing.assert_array_equal(restored.regressions()[2], statistics.regressions()[2])
+    np.testing.assert_array_equal(statistics.series([1]).regressions()[3],
+                                  statistics.regressions()[3][:, [1]])
+
+@pytest.mark.parametrize('engine', ['c', pytest.param('pyarrow', marks=requires_pyarrow)])
+def test_update_incremental(tmp_path, engine):
+    path = str(tmp_path / 'data.csv')
+    x = np.linspace(0, 10, 100)
+    rows = np.column_stack([x, np.sin(x), x**2])
+    order = np.r_[0, 99, np.random.default_rng(0).permutation(np.arange(1, 99))]
+    
+    def append(indices, mode='a'):
+        with open(path, mode) as f:
+            if mode == 'w':
+                f.write('x;a;b\n')
+            for row in rows[indices]:
+                f.write(';'.join(repr(float(value)) for value in row) + '\n')
+    
+    append(order[:50], 'w')
+    names, matrix, statistics = update_incremental(path, [6, 8])
+    assert names == ['x', 'a', 'b'] and len(matrix) == 50
+    
+    # Only the appended rows are parsed; a partial last line waits
+    append(order[50:])
+    with open(path, 'a') as f:
+        f.write('5.0;1.0;')
+    names, matrix, statistics = update_incremental(path, [6, 8])
+    assert len(matrix) == 100
+    np.testing.assert_allclose(np.sort(matrix[:, 0]), x)
+    for n in (6, 8):
+        expected = interval_regressions(matrix[:, 0], matrix[:, 1:], n)
+        for value, result in zip(expected, statistics[n].regressions()):
+            np.testing.assert_allclose(result, value, rtol=1e-10, atol=1e-12)
+    
+    # Nothing new: the sidecar is memory-mapped
+    names, matrix, statistics = update_incremental(path, [6, 8])
+    assert isinstance(matrix, np.memmap) and len(matrix) == 100
+    
+    # New rows are appended to the sidecar in place
+    sidecar = sidecar_path(path)
+    inode = os.stat(sidecar).st_ino
+    with open(path, 'a') as f:
+        f.write('2.0\n')  # Completes the partial line
+    names, matrix, statistics = update_incremental(path, [6, 8], engine=engine)
+    assert os.stat(sidecar).st_ino == inode and len(matrix) == 101
+    np.testing.assert_array_equal(matrix[-1], [5.0, 1.0, 2.0])
+    # The sidecar now holds the whole file, so read_matrix maps it
+    assert isinstance(read_matrix(path)[1], np.memmap)
+    
+    # Rows left in the sidecar by an interrupted update are overwritten
+    append_rows(sidecar, 101, np.zeros((3, 3)))
+    with open(path, 'a') as f:
+        f.write('6.0;0.5;1.5\n')
+    names, matrix, statistics = update_incremental(path, [6, 8])
+    assert len(matrix) == 102 and len(np.load(sidecar)) == 102
+    np.testing.assert_array_equal(matrix[-1], [6.0, 0.5, 1.5])
+    
+    # A point out of the range moves every interval edge
+    with open(path, 'a') as f:
+        f.write('12.0;0.0;1.0\n')
+    names, matrix, statistics = update_incremental(path, [6, 8])
+    assert len(matrix) == 103 and statistics[6].x_max == 12.0
+    expected = interval_regressions(matrix[:, 0], matrix[:, 1:], 6)
+    np.testing.assert_allclose(statistics[6].regressions()[2], expected[2], rtol=1e-10)
+    
+    # A file rewritten with fewer rows, or with other values, is processed again
+    x = np.linspace(0, 10, 30)
+    rows = np.column_stack([x, -5 * x, x**2])
+    append(np.arange(30), 'w')
+    names, matrix, statistics = update_incremental(path, [6, 8])
+    assert len(matrix) == 30
+    np.testing.assert_allclose(statistics[6].regressions()[2][:, 0], -5)
+    rows[:, 1] = 3 * x
+    append(np.arange(30), 'w')
+    names, matrix, statistics = update_incremental(path, [6, 8])
+    np.testing.assert_allclose(statistics[6].regressions()[2][:, 0], 3)
+
+def test_prefix_sums_residuals():
+    rng = np.random.default_rng(0)
+    x = rng.permutation(np.linspace(0, 10, 81))
+    ys = np.column_stack([np.sin(x), x**2]) + rng.normal(0, 0.1, (81, 2))
+    prefix_sums = PrefixSums(x, ys)
+    
+    for n in (5, 8):
+        residuals, counts = prefix_sums.residuals(n)
+        starts, ends, slopes, intercepts, expected_counts = interval_regressions(x, ys, n)
+        np.testing.assert_array_equal(counts, expected_counts)
+        for i in range(n):
+            mask = (x >= starts[i]) & (x <= ends[i])
+            errors = ys[mask] - (slopes[i] * x[mask, None] + intercepts[i])
+            np.testing.assert_allclose(residuals[i], (errors**2).sum(axis=0), rtol=1e-6)
+    
+    # Too many intervals for the points
+    assert np.isinf(prefix_sums.score(60)).all()
+
+def test_select_n():
+    # Piecewise linear data with a kink at x = 5: n = 2 already fits it
+    x = np.linspace(0, 10, 200)
+    y = np.abs(x - 5) + np.random.default_rng(0).normal(0, 0.01, 200)
+    scores, best = select_n(x, np.column_stack([y, np.sin(x)]), range(1, 9))
+    assert scores.shape == (8, 2)
+    assert best[0] == 2
+    
+    # Gridded x: the interval edges fall on data points. With 2 points per
+    # interval the lines interpolate them, so such n must not win
+    x = np.linspace(0, 10, 41)
+    rng = np.random.default_rng(1)
+    ys = np.column_stack([np.abs(x - 5) + rng.normal(0, 0.05, 41), 2 * x + 1 + rng.normal(0, 0.1, 41)])
+    scores, best = select_n(x, ys, range(1, 41))
+    assert np.isinf(scores[20:]).all() and np.isfinite(scores[19]).all()
+    assert best.tolist() == [2, 1]
+    
+    assert parse_n_range('3:7') == range(3, 8)
+    with pytest.raises(argparse.ArgumentTypeError):
+        parse_n_range('7:3')
+
 if __name__ == '__main__':
     pytest.main([__file__])